@@ -0,0 +1,191 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+# Benchmarks loading, saving and generating a synthetic site.
+#
+#   python -m benchmarks.benchmark --pages 1000 --posts 1000
+#
+# The results are written as json to benchmarks/results, use --compare to
+# compare them with the results of another commit.
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.sitegenerator import SiteGenerator
+from widgets.generator import Generator
+from widgets.headless import loadPlugins, loadSite, registerTypes
+from PyQt5.QtCore import QCoreApplication
+
+
+def peakMemory():
+    # maximum resident set size in kilobytes, render workers are counted separately
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    if sys.platform == "darwin":
+        return own // 1024, children // 1024
+    return own, children
+
+
+def gitCommit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=Generator.install_directory, stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+class Benchmark:
+
+    def __init__(self, args):
+        self.args = args
+        self.results = {}
+
+    def measure(self, name, function):
+        times = []
+        for i in range(self.args.repeat):
+            started = time.perf_counter()
+            value = function()
+            times.append(time.perf_counter() - started)
+        self.results[name] = min(times)
+        print("%-28s %10.3fs" % (name, min(times)))
+        return value
+
+    def run(self, source_path):
+        generator = SiteGenerator(self.args.pages, self.args.posts, self.args.sections, self.args.rows, self.args.columns, self.args.menus)
+        generator.write(source_path)
+        title = generator.title()
+        site_dir = os.path.join(Generator.sitesPath(), title)
+        cache_dir = os.path.join(Generator.cachePath(), title)
+
+        # the pages and posts are measured on their own
+        site = self.measure("load site", lambda: loadSite(os.path.join(source_path, "Site.qml"), contents=False))
+        self.measure("load pages", site.loadPages)
+        self.measure("load posts", site.loadPosts)
+
+        save_dir = os.path.join(source_path, "saved")
+        os.makedirs(save_dir)
+        def save():
+            for content in site.pages + site.posts:
+                content.save(os.path.join(save_dir, content.source))
+        self.measure("save content", save)
+
+        def fullBuild():
+            shutil.rmtree(site_dir, ignore_errors=True)
+            shutil.rmtree(cache_dir, ignore_errors=True)
+            self.generate(site)
+        self.measure("full build", fullBuild)
+        self.measure("incremental build", lambda: self.generate(site, incremental=True))
+        contents = site.pages + site.posts
+        content = contents[len(contents) // 2]
+        self.measure("single page build", lambda: self.generate(site, content))
+        self.measure("full build bundled", lambda: self.generate(site, bundle=True))
+        gen = self.measure("incremental build bundled", lambda: self.generate(site, incremental=True, bundle=True))
+        # nothing has changed since the full build, no page may be rendered again
+        self.results["bundled pages rendered"] = len(gen.profiler.pages)
+        print("%-28s %10d" % ("bundled pages rendered", len(gen.profiler.pages)))
+
+        own, children = peakMemory()
+        self.results["peak memory kb"] = own
+        self.results["peak worker memory kb"] = children
+        print("%-28s %10d kb" % ("peak memory", own))
+        print("%-28s %10d kb" % ("peak worker memory", children))
+
+        if not self.args.keep:
+            shutil.rmtree(site_dir, ignore_errors=True)
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    def generate(self, site, content = None, incremental = False, bundle = False):
+        gen = Generator()
+        gen.incremental = incremental
+        gen.bundle = bundle
+        gen.debug = False
+        if self.args.workers:
+            gen.workers = self.args.workers
+        gen.generateSite(None, site, content)
+        return gen
+
+    def report(self):
+        data = {}
+        data["commit"] = gitCommit()
+        data["date"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        data["python"] = platform.python_version()
+        data["machine"] = platform.machine()
+        data["cpus"] = os.cpu_count()
+        data["parameters"] = {k: v for k, v in vars(self.args).items() if k not in ["output", "compare", "keep"]}
+        data["results"] = self.results
+        return data
+
+    def save(self, filename):
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        with open(filename, "w") as f:
+            json.dump(self.report(), f, indent=4, sort_keys=True)
+        print("Results have been written to " + filename)
+
+    def compare(self, filename):
+        with open(filename, "r") as f:
+            old = json.load(f)
+        print("Compared with " + (old.get("commit") or filename))
+        for name, value in self.results.items():
+            before = old.get("results", {}).get(name)
+            if before:
+                print("%-28s %10.3f %10.3f %+8.1f%%" % (name, before, value, (value - before) * 100.0 / before))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="benchmark")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--sections", type=int, default=4, help="sections per page")
+    parser.add_argument("--rows", type=int, default=3, help="rows per section")
+    parser.add_argument("--columns", type=int, default=3, help="columns per row")
+    parser.add_argument("--menus", type=int, default=3)
+    parser.add_argument("-j", "--workers", type=int, default=0, help="number of render processes (default: one per core)")
+    parser.add_argument("--repeat", type=int, default=1, help="run every step this often and keep the fastest time")
+    parser.add_argument("--output", help="json file for the results (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", metavar="FILE", help="results of an earlier run to compare with")
+    parser.add_argument("--keep", action="store_true", help="keep the generated site in the sites directory")
+    args = parser.parse_args()
+
+    app = QCoreApplication(sys.argv)
+    Generator.install_directory = os.getcwd()
+    registerTypes()
+    loadPlugins(os.path.join(Generator.install_directory, "plugins"))
+
+    benchmark = Benchmark(args)
+    with tempfile.TemporaryDirectory() as source_path:
+        benchmark.run(source_path)
+
+    output = args.output
+    if not output:
+        output = os.path.join(Generator.install_directory, "benchmarks", "results", (gitCommit() or "unknown") + "-" + time.strftime("%Y%m%d-%H%M%S") + ".json")
+    benchmark.save(output)
+    if args.compare:
+        benchmark.compare(args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+# Writes synthetic sites in the format saved by FlatSiteBuilder, used by the benchmarks.
+
+import os
+import random
+
+LOREM = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+         "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+         "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat.")
+ANIMATIONS = ["", "fadeIn", "bounceIn", "zoomIn"]
+
+
+class SiteGenerator:
+
+    def __init__(self, pages = 100, posts = 100, sections = 4, rows = 3, columns = 3, menus = 3, images = 20, seed = 1):
+        self.pages = pages
+        self.posts = posts
+        self.sections = sections
+        self.rows = rows
+        self.columns = columns
+        self.menus = menus
+        self.images = images
+        self.random = random.Random(seed)
+
+    def title(self):
+        return "Benchmark-" + str(self.pages) + "-" + str(self.posts)
+
+    def write(self, source_path):
+        for dir in ["pages", "posts", os.path.join("assets", "images"), "content"]:
+            os.makedirs(os.path.join(source_path, dir), exist_ok=True)
+        self.writeFile(source_path, "Site.qml", self.siteQml())
+        self.writeFile(source_path, "Menus.qml", self.menusQml())
+        for i in range(self.images):
+            with open(os.path.join(source_path, "assets", "images", "image" + str(i) + ".jpg"), "wb") as f:
+                f.write(bytes(self.random.getrandbits(8) for _ in range(4096)))
+        self.writeFile(os.path.join(source_path, "content"), "robots.txt", "User-agent: *\nAllow: /\n")
+        for i in range(self.pages):
+            self.writeFile(os.path.join(source_path, "pages"), "page" + str(i) + ".qml", self.contentQml("Page " + str(i), "default", i, False))
+        for i in range(self.posts):
+            self.writeFile(os.path.join(source_path, "posts"), "post" + str(i) + ".qml", self.contentQml("Post " + str(i), "post", i, True))
+
+    def writeFile(self, dir, name, text):
+        with open(os.path.join(dir, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def siteQml(self):
+        qml = "import FlatSiteBuilder 2.0\n\n"
+        qml += "Site {\n"
+        qml += "   title: '" + self.title() + "'\n"
+        qml += "   theme: 'default'\n"
+        qml += "   description: 'Synthetic site for benchmarks'\n"
+        qml += "   copyright: 'Benchmark'\n"
+        qml += "   keywords: ''\n"
+        qml += "   author: 'benchmark'\n"
+        qml += "   logo: ''\n"
+        qml += "   publisher: ''\n"
+        qml += "}\n"
+        return qml
+
+    def menusQml(self):
+        qml = "import FlatSiteBuilder 2.0\n\n"
+        qml += "Menus {\n"
+        for m in range(self.menus):
+            qml += "    Menu {\n"
+            qml += "        name: '" + self.menuName(m) + "'\n"
+            for i in range(8):
+                qml += "        Menuitem {\n"
+                qml += "            title: 'Item " + str(i) + "'\n"
+                qml += "            url: 'page" + str(i % max(1, self.pages)) + ".html'\n"
+                qml += "            icon: ''\n"
+                for s in range(3 if i % 2 else 0):
+                    qml += "            Menuitem {\n"
+                    qml += "                title: 'Sub " + str(s) + "'\n"
+                    qml += "                url: 'page" + str((i + s) % max(1, self.pages)) + ".html'\n"
+                    qml += "                icon: ''\n"
+                    qml += "            }\n"
+                qml += "        }\n"
+            qml += "    }\n"
+        qml += "}\n"
+        return qml
+
+    def menuName(self, index):
+        return "default" if index == 0 else "menu" + str(index)
+
+    def contentQml(self, title, layout, index, post):
+        qml = "import FlatSiteBuilder 2.0\n"
+        qml += "import TextEditor 1.0\n"
+        qml += "import ImageEditor 1.0\n"
+        qml += "import RevolutionSlider 1.0\n\n"
+        qml += "Content {\n"
+        qml += "    title: \"" + title + "\"\n"
+        qml += "    menu: \"" + self.menuName(index % self.menus) + "\"\n"
+        qml += "    author: \"benchmark\"\n"
+        qml += "    layout: \"" + layout + "\"\n"
+        if post:
+            qml += "    excerpt: \"" + LOREM[:80] + "\"\n"
+        qml += "    date: \"" + "%04d-%02d-%02d" % (2010 + index % 10, 1 + index % 12, 1 + index % 28) + "\"\n"
+        if not post:
+            qml += self.sliderQml()
+        for s in range(self.sections):
+            qml += "\n    Section {\n"
+            qml += "        cssclass: \"container\"\n"
+            for r in range(self.rows):
+                qml += "\n        Row {\n"
+                for c in range(self.columns):
+                    qml += "\n            Column {\n"
+                    qml += "                span: " + str(12 // self.columns) + "\n"
+                    qml += self.elementQml(s, r, c)
+                    qml += "            }\n"
+                qml += "        }\n"
+            qml += "    }\n"
+        qml += "}\n"
+        return qml
+
+    def elementQml(self, section, row, column):
+        indent = " " * 16
+        if (section + row + column) % 3 == 1:
+            image = "image" + str(self.random.randrange(self.images)) + ".jpg"
+            qml = "\n" + indent + "Image {\n"
+            qml += indent + "    src: \"/benchmark/assets/images/" + image + "\"\n"
+            qml += indent + "    alt: \"" + image + "\"\n"
+            qml += indent + "    title: \"" + image + "\"\n"
+            animation = self.random.choice(ANIMATIONS)
+            if animation:
+                qml += indent + "    animation: \"" + animation + "\"\n"
+            qml += indent + "}\n"
+            return qml
+        text = "&lt;p&gt;" + LOREM + "&lt;/p&gt;"
+        if (section + row + column) % 3 == 2:
+            # some bodies use jinja, the others are plain html
+            text = "&lt;h3&gt;{{ page.title }}&lt;/h3&gt;" + text
+        qml = "\n" + indent + "Text {\n"
+        qml += indent + "    text: \"" + text + "\"\n"
+        qml += indent + "    adminlabel: \"text\"\n"
+        qml += indent + "}\n"
+        return qml
+
+    def sliderQml(self):
+        qml = "\n    Section {\n"
+        qml += "        fullwidth: true\n"
+        qml += "\n        RevolutionSlider {\n"
+        qml += "            fullwidth: true\n"
+        for i in range(3):
+            qml += "\n            Slide {\n"
+            qml += "                src: \"assets/images/image" + str(self.random.randrange(self.images)) + ".jpg\"\n"
+            qml += "                text: \"&lt;h2&gt;Slide " + str(i) + "&lt;/h2&gt;\"\n"
+            qml += "            }\n"
+        qml += "        }\n"
+        qml += "    }\n"
+        return qml
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+# Headless command line interface, it runs without QApplication and widgets.
+#
+#   python -m flatsitebuilder build sources/<site>
+#   python -m flatsitebuilder watch sources/<site>
+#   python -m flatsitebuilder serve sources/<site>
+
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+from widgets.assetsync import AssetSync
+from widgets.generator import Generator
+from widgets.postindex import POSTS_PER_PAGE
+from widgets.headless import loadPlugins, loadSite, registerTypes
+from widgets.previewserver import PreviewServer
+from widgets.sitewatcher import SiteWatcher
+from PyQt5.QtCore import QCoreApplication
+
+
+def loadSource(args):
+    site = loadSite(os.path.join(os.path.abspath(args.source), "Site.qml"))
+    if not site:
+        return None
+    if len(site.pages) == 0 and len(site.posts) == 0:
+        print("Site has no pages or posts to build.")
+        return None
+    return site
+
+
+def createGenerator(args):
+    gen = Generator()
+    gen.incremental = args.incremental
+    gen.staged = args.staged
+    gen.debug = not args.production
+    gen.bytecode_cache = args.bytecode_cache
+    if args.workers:
+        gen.workers = args.workers
+    gen.link_mode = args.link
+    gen.checksum = args.checksum
+    gen.posts_per_page = args.posts_per_page
+    gen.base_url = args.base_url
+    gen.search = not args.no_search
+    gen.minify = args.minify
+    gen.fingerprint = args.fingerprint
+    gen.compress = args.compress
+    gen.bundle = args.bundle
+    gen.prune_css = args.prune_css
+    gen.responsive_images = not args.no_responsive_images
+    return gen
+
+
+def build(args):
+    site = loadSource(args)
+    if not site:
+        return 1
+
+    gen = createGenerator(args)
+    success = gen.generateSite(None, site)
+    if args.profile:
+        gen.profiler.save(args.profile)
+        print(gen.profiler.summary())
+    if not success:
+        return 1
+    print(site.title + " has been generated")
+    return 0
+
+
+def watch(args):
+    site = loadSource(args)
+    if not site:
+        return 1
+
+    args.incremental = True
+    createGenerator(args).generateSite(None, site)
+    print(site.title + " has been generated, watching " + site.source_path + " for changes")
+    watcher = SiteWatcher(site, None, lambda: createGenerator(args))
+    watcher.built.connect(print)
+    # let Ctrl+C stop the event loop
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    return QCoreApplication.exec_()
+
+
+def serve(args):
+    site = loadSource(args)
+    if not site:
+        return 1
+
+    server = PreviewServer(site, args.host, args.port, not args.production)
+    server.start()
+    print("Serving " + site.title + " at " + server.url())
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    return QCoreApplication.exec_()
+
+
+def addBuildArguments(parser):
+    parser.add_argument("source", help="site source directory containing Site.qml")
+    parser.add_argument("-s", "--staged", action="store_true", help="build into a staging directory and swap it with the output when the build succeeds")
+    parser.add_argument("-p", "--production", action="store_true", help="render templates without debug information")
+    parser.add_argument("--bytecode-cache", action="store_true", help="keep compiled page templates in the cache directory between builds")
+    parser.add_argument("-j", "--workers", type=int, default=0, help="number of render processes (default: one per core)")
+    parser.add_argument("--link", choices=[AssetSync.COPY, AssetSync.HARDLINK, AssetSync.REFLINK], default=AssetSync.COPY, help="how assets are put into the site directory")
+    parser.add_argument("--posts-per-page", type=int, default=POSTS_PER_PAGE, help="number of posts on a page of the blog listing and the archives")
+    parser.add_argument("--base-url", default="", help="url of the published site for the sitemap and the feeds (default: the url of Site.qml)")
+    parser.add_argument("-m", "--minify", action="store_true", help="minify the pages and the css and js assets")
+    parser.add_argument("--fingerprint", action="store_true", help="copy assets to names containing a hash of their content and refer to these in the pages")
+    parser.add_argument("-z", "--compress", action="store_true", help="write gzip and brotli compressed copies of html, css, js and svg files")
+    parser.add_argument("-b", "--bundle", action="store_true", help="bundle the styles and scripts of the plugins used on a page into one css and one js file")
+    parser.add_argument("--prune-css", action="store_true", help="remove the rules of stylesheets whose selectors match nothing in the pages, templates and scripts")
+    parser.add_argument("--no-responsive-images", action="store_true", help="use images as they are instead of resized copies")
+    parser.add_argument("--no-search", action="store_true", help="do not write the full-text search index")
+    parser.add_argument("--checksum", action="store_true", help="compare asset contents when size and mtime are not conclusive")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="flatsitebuilder")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    build_parser = commands.add_parser("build", help="generate the site into sites/<title>")
+    addBuildArguments(build_parser)
+    build_parser.add_argument("-i", "--incremental", action="store_true", help="only render outputs whose inputs have changed")
+    build_parser.add_argument("--profile", metavar="FILE", help="write a timing report of the build as json and print the slowest pages")
+    build_parser.set_defaults(func=build)
+
+    watch_parser = commands.add_parser("watch", help="build the site and rebuild it whenever its sources or the theme change")
+    addBuildArguments(watch_parser)
+    watch_parser.set_defaults(func=watch)
+
+    serve_parser = commands.add_parser("serve", help="serve the site for previewing, pages are rendered on request and reloaded when the sources change")
+    serve_parser.add_argument("source", help="site source directory containing Site.qml")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    serve_parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    serve_parser.add_argument("-p", "--production", action="store_true", help="render templates without debug information")
+    serve_parser.set_defaults(func=serve)
+
+    args = parser.parse_args()
+
+    QCoreApplication.setApplicationName("FlatSiteBuilder")
+    QCoreApplication.setApplicationVersion("2.0.0")
+    QCoreApplication.setOrganizationName("Artanidos")
+    app = QCoreApplication(sys.argv)
+
+    Generator.install_directory = os.getcwd()
+    registerTypes()
+    loadPlugins(os.path.join(Generator.install_directory, "plugins"))
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
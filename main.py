@@ -20,6 +20,7 @@
 #
 #############################################################################
 
+import multiprocessing
 import sys
 from widgets.mainwindow import MainWindow
 from widgets.site import Site
@@ -33,27 +34,32 @@ from widgets.menuitem import Menuitem
 from PyQt5.QtWidgets import QApplication, QStyleFactory
 from PyQt5.QtCore import Qt, QCoreApplication, QSettings
 from PyQt5.QtGui import QPalette, QColor, QIcon, QFont
-from PyQt5.QtQml import qmlRegisterType
+from widgets.qmlparser import registerType
+from widgets.previewschemehandler import registerPreviewScheme
 import main_rc
 
 
 if __name__ == "__main__":
+    # needed by the parallel build in frozen (pyinstaller) bundles
+    multiprocessing.freeze_support()
+
     QCoreApplication.setApplicationName("FlatSiteBuilder")
     QCoreApplication.setApplicationVersion("2.0.0")
     QCoreApplication.setOrganizationName("Artanidos")
 
+    registerPreviewScheme()
     app = QApplication(sys.argv)
     app.setStyle(QStyleFactory.create("Fusion"))
     app.setStyleSheet("QPushButton:hover { color: #45bbe6 }")
 
-    qmlRegisterType(Site, 'FlatSiteBuilder', 2, 0, 'Site')
-    qmlRegisterType(Content, 'FlatSiteBuilder', 2, 0, 'Content')
-    qmlRegisterType(Menus, 'FlatSiteBuilder', 2, 0, 'Menus')
-    qmlRegisterType(Menu, 'FlatSiteBuilder', 2, 0, 'Menu')
-    qmlRegisterType(Menuitem, 'FlatSiteBuilder', 2, 0, 'Menuitem')
-    qmlRegisterType(Section, 'FlatSiteBuilder', 2, 0, 'Section')
-    qmlRegisterType(Row, 'FlatSiteBuilder', 2, 0, 'Row')
-    qmlRegisterType(Column, 'FlatSiteBuilder', 2, 0, 'Column')
+    registerType(Site, 'FlatSiteBuilder', 2, 0, 'Site')
+    registerType(Content, 'FlatSiteBuilder', 2, 0, 'Content')
+    registerType(Menus, 'FlatSiteBuilder', 2, 0, 'Menus')
+    registerType(Menu, 'FlatSiteBuilder', 2, 0, 'Menu')
+    registerType(Menuitem, 'FlatSiteBuilder', 2, 0, 'Menuitem')
+    registerType(Section, 'FlatSiteBuilder', 2, 0, 'Section')
+    registerType(Row, 'FlatSiteBuilder', 2, 0, 'Row')
+    registerType(Column, 'FlatSiteBuilder', 2, 0, 'Column')
 
     font = QFont("Sans Serif", 10)
     app.setFont(font)
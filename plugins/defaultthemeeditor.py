@@ -31,14 +31,15 @@ from widgets.item import Item
 
 
 class DefaultThemeEditor(ThemeEditorInterface):
+    class_name = "DefaultThemeEditor"
+    display_name = "Default Theme Editor"
+    theme_name = "default"
+    version = "1.0"
+    isHidePoweredByEnabled = False
+
     def __init__(self):
         ThemeEditorInterface.__init__(self)
-        self.class_name = "DefaultThemeEditor"
-        self.display_name = "Default Theme Editor"
-        self.theme_name = "default"
-        self.version = "1.0"
         self.win = None
-        self.isHidePoweredByEnabled = False
 
         self.hidePoweredBy = QCheckBox("Hide powered by FlatSiteBuilder in footer")
         self.titleLabel.setText("Default Theme Settings")
@@ -21,24 +21,26 @@
 import os
 import shutil
 from widgets.interfaces import ElementEditorInterface
+from widgets.qmlparser import registerType
 from PyQt5.QtGui import QImage
 from PyQt5.QtCore import Qt, qVersion, QFile, QDir, qRegisterResourceData, qUnregisterResourceData, pyqtProperty
 from PyQt5.QtWidgets import QGridLayout, QLineEdit, QPushButton, QLabel, QFileDialog, QListWidget, QListWidgetItem
-from PyQt5.QtQml import qmlRegisterType
 from widgets.imageselector import ImageSelector
 from widgets.flatbutton import FlatButton
 from widgets.item import Item
+from widgets.imagederivatives import responsiveImage
 
 
 class ImageEditor(ElementEditorInterface):
+    class_name = "ImageEditor"
+    display_name = "Image"
+    tag_name = "Image"
+    version = "1.0"
+
     def __init__(self):
         ElementEditorInterface.__init__(self)
         self.site = None
         self.animation = ""
-        self.class_name = "ImageEditor"
-        self.display_name = "Image"
-        self.tag_name = "Image"
-        self.version = "1.0"
         self.icon = QImage(":/imageeditor.png")
 
         self.changed = False
@@ -279,7 +281,7 @@ class ImageEditor(ElementEditorInterface):
         self.contentChanged()
 
     def registerContenType(self):
-        qmlRegisterType(Image, 'ImageEditor', 1, 0, 'Image')
+        registerType(Image, 'ImageEditor', 1, 0, 'Image')
 
     def writeImportString(self, f):
         f.write("import ImageEditor 1.0\n")
@@ -359,9 +361,9 @@ class Image(Item):
     def getHtml(self):
         src = self.src[self.src.index("/assets/images") + 14:]
         if self._animation:
-            return "<img alt=\"" + self.alt + "\" title=\"" + self.title + "\" class=\"img-responsive animated " + self._animation + " pull-left inner\" src=\"assets/images/" + src + "\">\n"
+            return responsiveImage("assets/images/" + src, "alt=\"" + self.alt + "\" title=\"" + self.title + "\" class=\"img-responsive animated " + self._animation + " pull-left inner\"") + "\n"
         else:
-            return "<img alt=\"" + self.alt + "\" title=\"" + self.title + "\" class=\"img-responsive pull-left inner\" src=\"assets/images/" + src + "\">\n"
+            return responsiveImage("assets/images/" + src, "alt=\"" + self.alt + "\" title=\"" + self.title + "\" class=\"img-responsive pull-left inner\"") + "\n"
 
 
 qt_resource_data = b"\
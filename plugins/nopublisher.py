@@ -82,9 +82,10 @@ html = \
 "</html>"
 
 class NoPublisher(PublisherInterface):
+    display_name = "NoPublisher"
+
     def __init__(self):
         QWidget.__init__(self)
-        self.display_name = "NoPublisher"
         self.browser = QTextBrowser()
         self.browser.setHtml(html)
         layout = QVBoxLayout()
@@ -20,18 +20,20 @@
 
 import html
 from widgets.interfaces import ElementEditorInterface
+from widgets.qmlparser import registerType
 from widgets.item import Item
-from PyQt5.QtQml import qmlRegisterType
+from widgets.imageindex import imageDimensions
 from PyQt5.QtCore import pyqtProperty, QObject, Q_CLASSINFO, QDir, QFile
 from PyQt5.QtQml import QQmlListProperty
 
 class RevolutionSliderEditor(ElementEditorInterface):
+    class_name = "RevolutionSliderEditor"
+    display_name = "RevolutionSlider"
+    tag_name = "RevolutionSlider"
+    version = "1.0"
+
     def __init__(self):
         ElementEditorInterface.__init__(self)
-        self.class_name = "RevolutionSliderEditor"
-        self.display_name = "RevolutionSlider"
-        self.tag_name = "RevolutionSlider"
-        self.version = "1.0"
 
     def closeEditor(self):
         if self.changed:
@@ -41,8 +43,8 @@ class RevolutionSliderEditor(ElementEditorInterface):
         self.close.emit()
 
     def registerContenType(self):
-        qmlRegisterType(RevolutionSlider, 'RevolutionSlider', 1, 0, 'RevolutionSlider')
-        qmlRegisterType(Slide, 'RevolutionSlider', 1, 0, 'Slide')
+        registerType(RevolutionSlider, 'RevolutionSlider', 1, 0, 'RevolutionSlider')
+        registerType(Slide, 'RevolutionSlider', 1, 0, 'Slide')
     
     def writeImportString(self, f):
         f.write("import RevolutionSlider 1.0\n")
@@ -144,7 +146,7 @@ class RevolutionSlider(Item):
     def fullwidth(self, fullwidth):
         self._fullwidth = fullwidth
 
-    def getHtml(self):
+    def writeHtml(self, f):
         sliderContainerClass = ""
         sliderClass = ""
 
@@ -156,21 +158,24 @@ class RevolutionSlider(Item):
             sliderContainerClass = "fullwidthbanner-container"
             sliderClass = "fullwidthbanner"
         
-        htm = "<div class=\"" + sliderContainerClass + "\">\n"
-        htm += "<div class=\"" + sliderClass + "\">\n"
-        htm += "<ul>\n"
+        f.write("<div class=\"" + sliderContainerClass + "\">\n")
+        f.write("<div class=\"" + sliderClass + "\">\n")
+        f.write("<ul>\n")
         for slide in self._items:
             url = slide.src[slide.src.index("assets/images/"):]
-            htm += "<li data-transition=\"" + self._data_transition + "\" data-masterspeed=\"" + self._data_masterspeed + "\""
-            htm += ">\n"
-            htm += "<img src=\"" + url + "\" alt=\"\" data-bgfit=\"cover\" data-bgposition=\"center center\" data-bgrepeat=\"no-repeat\">\n"
-            htm += html.unescape(slide._text) + "\n"
-            htm += "</li>\n"        
-        htm += "</ul>\n"
-        htm += "<div class=\"tp-bannertimer\"></div>\n"
-        htm += "</div>\n"
-        htm += "</div>\n"
-        return htm
+            f.write("<li data-transition=\"" + self._data_transition + "\" data-masterspeed=\"" + self._data_masterspeed + "\"")
+            f.write(">\n")
+            f.write("<img src=\"" + url + "\" alt=\"\"")
+            size = imageDimensions(url)
+            if size:
+                f.write(" width=\"" + str(size[0]) + "\" height=\"" + str(size[1]) + "\" loading=\"lazy\" decoding=\"async\"")
+            f.write(" data-bgfit=\"cover\" data-bgposition=\"center center\" data-bgrepeat=\"no-repeat\">\n")
+            f.write(html.unescape(slide._text) + "\n")
+            f.write("</li>\n")
+        f.write("</ul>\n")
+        f.write("<div class=\"tp-bannertimer\"></div>\n")
+        f.write("</div>\n")
+        f.write("</div>\n")
 
     def save(self, f, indent):
         f.write("\n")
@@ -19,8 +19,8 @@
 #############################################################################
 
 from widgets.interfaces import ElementEditorInterface
+from widgets.qmlparser import registerType
 from widgets.item import Item
-from PyQt5.QtQml import qmlRegisterType
 from PyQt5.QtCore import pyqtProperty
 
 
@@ -37,7 +37,7 @@ class SlideEditor(ElementEditorInterface):
         self.close.emit()
 
     def registerContenType(self):
-        qmlRegisterType(Slide, 'Slide', 1, 0, 'Slide')
+        registerType(Slide, 'Slide', 1, 0, 'Slide')
 
     def writeImportString(self, f):
         f.write("import Slide 1.0\n")
@@ -30,24 +30,24 @@ from widgets.columneditor import ColumnEditor
 from widgets.elementeditor import ElementEditor, Mode
 from widgets.content import ContentType
 from widgets.interfaces import ElementEditorInterface
+from widgets.qmlparser import registerType
 from widgets.item import Item
 from PyQt5.QtWidgets import QUndoStack, QHBoxLayout, QTextEdit, QVBoxLayout, QGridLayout, QLabel, QPushButton, QLineEdit, QComboBox, QScrollArea
 from PyQt5.QtCore import Qt, QUrl, QRegExp, pyqtSignal, qVersion, qRegisterResourceData, qUnregisterResourceData
 from PyQt5.QtGui import QFont, QFontMetrics, QImage, QSyntaxHighlighter, QTextCharFormat, QColor
-from PyQt5.QtQml import qmlRegisterType
 import resources
 
 
 class TextEditor(ElementEditorInterface):
     close = pyqtSignal()
+    class_name = "TextEditor"
+    display_name = "Text"
+    tag_name = "Text"
+    version = "1.0"
 
     def __init__(self):
         ElementEditorInterface.__init__(self)
         self.site = None
-        self.class_name = "TextEditor"
-        self.display_name = "Text"
-        self.tag_name = "Text"
-        self.version = "1.0"
         self.icon = QImage(":/texteditor.png")
         self.changed = False
         self.setAutoFillBackground(True)
@@ -126,7 +126,7 @@ class TextEditor(ElementEditorInterface):
         self.close.emit()
 
     def registerContenType(self):
-        qmlRegisterType(Text, 'TextEditor', 1, 0, 'Text')
+        registerType(Text, 'TextEditor', 1, 0, 'Text')
 
     def writeImportString(self, f):
         f.write("import TextEditor 1.0\n")
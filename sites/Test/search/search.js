@@ -0,0 +1,40 @@
+// Searches the index written by FlatSiteBuilder, only the shards of the query words are loaded.
+// siteSearch("some words", function(results) { ... }) calls back with [{url, title, score}], best first.
+var siteSearch = (function() {
+    var base = document.currentScript ? document.currentScript.src.replace(/[^/]*$/, "") : "search/";
+    var loaded = {};
+    function load(name) {
+        if (!(name in loaded))
+            loaded[name] = fetch(base + name).then(function(r) { return r.json(); });
+        return loaded[name];
+    }
+    function shardName(term) {
+        return term.substr(0, 2).replace(/[^a-z0-9]/g, "_");
+    }
+    return function(query, callback) {
+        var terms = (query.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || []).filter(function(t) { return t.length > 1; });
+        load("docs.json").then(function(index) {
+            var names = terms.map(shardName).filter(function(n) { return index.shards.indexOf(n) >= 0; });
+            return Promise.all(names.map(function(n) { return load(n + ".json"); })).then(function(list) {
+                var shards = {};
+                names.forEach(function(n, i) { shards[n] = list[i]; });
+                var scores = {};
+                var matched = {};
+                terms.forEach(function(term) {
+                    var shard = shards[shardName(term)] || {};
+                    (shard[term] || []).forEach(function(posting) {
+                        scores[posting[0]] = (scores[posting[0]] || 0) + posting[1];
+                        matched[posting[0]] = (matched[posting[0]] || 0) + 1;
+                    });
+                });
+                var results = [];
+                for (var id in scores) {
+                    if (matched[id] == terms.length && index.docs[id])
+                        results.push({url: index.docs[id][0], title: index.docs[id][1], score: scores[id]});
+                }
+                results.sort(function(a, b) { return b.score - a.score; });
+                callback(results);
+            });
+        });
+    };
+})();
@@ -0,0 +1,118 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import hashlib
+import os
+import posixpath
+import re
+from widgets.fingerprinter import CSS_URL
+
+BUNDLE_DIR = "assets/bundles"
+STYLE_LINK = re.compile(r"""<link\b[^>]*\bhref=["']([^"']+)["'][^>]*>\s*""", re.I)
+SCRIPT_SRC = re.compile(r"""<script\b[^>]*\bsrc=["']([^"']+)["'][^>]*>\s*</script>\s*""", re.I)
+
+
+def rebaseCss(css, from_dir, to_dir):
+    # relative urls of a stylesheet moved from from_dir to to_dir
+    def replace(m):
+        prefix, url, suffix = (m.group(1), m.group(3), m.group(4)) if m.group(1) else (m.group(5), m.group(7), m.group(8))
+        if url.startswith(("data:", "http:", "https:", "//", "#", "/")):
+            return m.group(0)
+        return prefix + posixpath.relpath(posixpath.normpath(posixpath.join(from_dir, url)), to_dir) + suffix
+
+    return CSS_URL.sub(replace, css)
+
+
+# Bundles the stylesheets and scripts which element plugins add to a page into
+# one css and one js file, named by the hash of their content. The files are
+# de-duplicated and kept in the order of the plugins, pages using the same
+# plugins get the same bundles. References to other sites, inline code and files
+# which do not exist are left in the page as they are.
+class AssetBundler:
+
+    def __init__(self, site_dir):
+        self.site_dir = site_dir
+        self.bundles = {}
+        self.written = set()
+
+    def bundle(self, styles, scripts):
+        key = (styles, scripts)
+        if key not in self.bundles:
+            styles = self.replace(styles, STYLE_LINK, ".css", "<link href=\"{}\" rel=\"stylesheet\" type=\"text/css\"/>\n")
+            scripts = self.replace(scripts, SCRIPT_SRC, ".js", "<script type=\"text/javascript\" src=\"{}\"></script>\n")
+            self.bundles[key] = (styles, scripts)
+        return self.bundles[key]
+
+    def replace(self, html, pattern, ext, tag):
+        names = []
+        rest = []
+        pos = 0
+        for m in pattern.finditer(html):
+            rest.append(html[pos:m.start()])
+            pos = m.end()
+            name = posixpath.normpath(m.group(1))
+            if ext == ".css" and "stylesheet" not in m.group(0).lower():
+                rest.append(m.group(0))
+            elif name.startswith("assets/") and os.path.isfile(os.path.join(self.site_dir, name)):
+                if name not in names:
+                    names.append(name)
+            else:
+                rest.append(m.group(0))
+        rest.append(html[pos:])
+        if not names:
+            return html
+        rest = "".join(rest).strip()
+        return tag.format(self.write(names, ext)) + (rest + "\n" if rest else "")
+
+    def write(self, names, ext):
+        parts = []
+        for name in names:
+            with open(os.path.join(self.site_dir, name), "r", encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            if ext == ".css":
+                text = rebaseCss(text, posixpath.dirname(name), BUNDLE_DIR)
+            parts.append("/* " + name + " */\n" + text.strip() + "\n")
+        # a script without a semicolon at its end must not run into the next one
+        data = (";\n" if ext == ".js" else "").join(parts).encode("utf-8")
+        name = posixpath.join(BUNDLE_DIR, hashlib.sha1(data).hexdigest()[:10] + ext)
+        filename = os.path.join(self.site_dir, name)
+        if not os.path.exists(filename):
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            with open(filename + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(filename + ".tmp", filename)
+        self.written.add(name)
+        return name
+
+    def removeStale(self, assets):
+        # bundles of plugin combinations no longer used, files of the site itself are kept
+        bundle_dir = os.path.join(self.site_dir, BUNDLE_DIR)
+        if not os.path.isdir(bundle_dir):
+            return
+        for file in os.listdir(bundle_dir):
+            name = posixpath.join(BUNDLE_DIR, file)
+            if name in self.written or name in assets:
+                continue
+            # compressed siblings of bundles in use
+            if file.endswith((".gz", ".br")) and name[:-3] in self.written:
+                continue
+            os.remove(os.path.join(bundle_dir, file))
+        if not os.listdir(bundle_dir):
+            os.rmdir(bundle_dir)
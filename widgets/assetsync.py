@@ -0,0 +1,208 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import json
+import os
+import shutil
+import sys
+from widgets.buildcache import BuildCache
+from widgets.minifier import Minifier
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409
+
+
+# Copies asset trees into the site directory. Only new or changed files are
+# copied and files whose source has been removed are deleted again.
+# The manifest remembers which output files have been copied by the sync,
+# rendered pages and plugin assets are never touched.
+class AssetSync:
+    COPY = "copy"
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+
+    def __init__(self, manifest, mode = "copy", checksum = False):
+        self.manifest = manifest
+        self.mode = mode
+        self.checksum = checksum
+        self.minifier = None
+        # stylesheets pruned after the last build by their size and mtime
+        self.pruned = {}
+        self.files = {}
+        self.synced = {}
+        self.changed = []
+
+    def addTree(self, src, dst):
+        # later trees override files of earlier trees, like theme assets are overridden by site assets
+        if not os.path.isdir(src):
+            return
+        for root, dirs, files in os.walk(src):
+            for file in files:
+                srcname = os.path.join(root, file)
+                self.files[os.path.normpath(os.path.join(dst, os.path.relpath(srcname, src)))] = srcname
+
+    def hasManifest(self):
+        return os.path.exists(self.manifest)
+
+    def loadManifest(self):
+        try:
+            with open(self.manifest, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def saveManifest(self):
+        os.makedirs(os.path.dirname(self.manifest), exist_ok=True)
+        tmp = self.manifest + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.synced, f, sort_keys=True)
+        os.replace(tmp, self.manifest)
+
+    def sync(self, site_dir):
+        old = self.loadManifest()
+        self.synced = {}
+        self.changed = []
+        minify = []
+        for name, srcname in sorted(self.files.items()):
+            dstname = os.path.join(site_dir, name)
+            try:
+                if name in self.pruned and self.isPruned(srcname, dstname, old.get(name), self.pruned[name], self.minifier and Minifier.kind(name)):
+                    self.synced[name] = old[name]
+                    continue
+                if self.minifier and Minifier.kind(name):
+                    if not self.isMinified(srcname, dstname, old.get(name)):
+                        os.makedirs(os.path.dirname(dstname), exist_ok=True)
+                        minify.append((srcname, dstname))
+                        self.changed.append(name)
+                    self.synced[name] = self.fingerprint(srcname, old.get(name)) + ["min"]
+                    continue
+                if not self.isUpToDate(srcname, dstname, old.get(name)):
+                    self.copyFile(srcname, dstname)
+                    self.changed.append(name)
+                self.synced[name] = self.fingerprint(srcname, old.get(name))
+            except OSError:
+                type, value, traceback = sys.exc_info()
+                print("Asset sync failed: Unable to copy " + srcname, type, value, traceback)
+
+        if minify:
+            # files which cannot be minified are copied as they are
+            for dstname in self.minifier.minifyFiles(minify):
+                name = os.path.relpath(dstname, site_dir)
+                try:
+                    self.copyFile(self.files[name], dstname)
+                    self.synced[name] = self.synced[name][:3]
+                except OSError:
+                    type, value, traceback = sys.exc_info()
+                    print("Asset sync failed: Unable to copy " + self.files[name], type, value, traceback)
+
+        for name in old:
+            if name not in self.synced:
+                self.removeFile(site_dir, name)
+        return self.changed
+
+    def fingerprint(self, srcname, entry):
+        st = os.stat(srcname)
+        if not self.checksum:
+            return [st.st_size, st.st_mtime_ns, ""]
+        if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns and entry[2]:
+            return entry[:3]
+        return [st.st_size, st.st_mtime_ns, BuildCache.hashFile(srcname)]
+
+    def isPruned(self, srcname, dstname, entry, output, minify):
+        # a pruned output is kept while it has been made of the same source in the same way
+        if not entry or (entry[3:] == ["min"]) != bool(minify):
+            return False
+        try:
+            dst = os.stat(dstname)
+        except OSError:
+            return False
+        src = os.stat(srcname)
+        return entry[0] == src.st_size and entry[1] == src.st_mtime_ns and dst.st_mtime_ns == output[0] and dst.st_size == output[1]
+
+    def isMinified(self, srcname, dstname, entry):
+        # a minified output differs from its source, the manifest tells which source it has been made of
+        if not entry or entry[3:] != ["min"]:
+            return False
+        try:
+            dst = os.stat(dstname)
+        except OSError:
+            return False
+        src = os.stat(srcname)
+        return entry[0] == src.st_size and entry[1] == src.st_mtime_ns and dst.st_mtime_ns == src.st_mtime_ns
+
+    def isUpToDate(self, srcname, dstname, entry):
+        if entry and entry[3:] == ["min"]:
+            return False
+        try:
+            dst = os.stat(dstname)
+        except OSError:
+            return False
+        src = os.stat(srcname)
+        if src.st_size != dst.st_size:
+            return False
+        if src.st_mtime_ns == dst.st_mtime_ns:
+            return True
+        # same size but other mtime, for example after a checkout, only the content can tell
+        if self.checksum:
+            return self.fingerprint(srcname, entry)[2] == BuildCache.hashFile(dstname)
+        return False
+
+    def copyFile(self, srcname, dstname):
+        os.makedirs(os.path.dirname(dstname), exist_ok=True)
+        # the new file replaces the old one, so a hardlinked output never writes through to its source
+        tmp = dstname + ".sync"
+        if os.path.lexists(tmp):
+            os.remove(tmp)
+        if self.mode == AssetSync.HARDLINK:
+            try:
+                os.link(srcname, tmp)
+                os.replace(tmp, dstname)
+                return
+            except OSError:
+                pass
+        elif self.mode == AssetSync.REFLINK and fcntl:
+            try:
+                with open(srcname, "rb") as src, open(tmp, "wb") as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                shutil.copystat(srcname, tmp)
+                os.replace(tmp, dstname)
+                return
+            except OSError:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        shutil.copy2(srcname, tmp)
+        os.replace(tmp, dstname)
+
+    def removeFile(self, site_dir, name):
+        dstname = os.path.join(site_dir, name)
+        if os.path.exists(dstname):
+            os.remove(dstname)
+        # also remove directories which are empty now
+        dir = os.path.dirname(dstname)
+        while os.path.normpath(dir) != os.path.normpath(site_dir):
+            try:
+                os.rmdir(dir)
+            except OSError:
+                break
+            dir = os.path.dirname(dir)
@@ -0,0 +1,171 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import hashlib
+import json
+import os
+import re
+import sys
+
+
+class BuildCache:
+    version = 1
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.outputs = {}
+        self.files = {}
+        self.plugins = {}
+        self.checked = {}
+        self.template_deps = {}
+
+    @staticmethod
+    def valueFingerprint(value):
+        # bound methods like content.url are called, the same way django does
+        data = json.dumps(value, sort_keys=True, default=lambda o: o() if callable(o) else str(o))
+        return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def hashFile(path):
+        sha = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                sha.update(chunk)
+        return sha.hexdigest()
+
+    def load(self):
+        self.outputs = {}
+        self.files = {}
+        self.plugins = {}
+        if not os.path.exists(self.filename):
+            return False
+        try:
+            with open(self.filename, "r") as f:
+                data = json.load(f)
+        except:
+            type, value, traceback = sys.exc_info()
+            print("Unable to read build cache " + self.filename, type, value, traceback)
+            return False
+        if data.get("version") != BuildCache.version:
+            return False
+        self.outputs = data.get("outputs", {})
+        self.files = data.get("files", {})
+        self.plugins = data.get("plugins", {})
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        data = {}
+        data["version"] = BuildCache.version
+        data["outputs"] = self.outputs
+        data["files"] = self.files
+        data["plugins"] = self.plugins
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, sort_keys=True)
+        os.replace(tmp, self.filename)
+
+    def fileFingerprint(self, path):
+        # every file is checked only once per build, the hash is only
+        # recalculated when size or mtime have changed since the last build
+        if path in self.checked:
+            return self.checked[path]
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.files.pop(path, None)
+            self.checked[path] = ""
+            return ""
+        entry = self.files.get(path)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            fingerprint = entry[2]
+        else:
+            fingerprint = BuildCache.hashFile(path)
+            self.files[path] = [st.st_mtime_ns, st.st_size, fingerprint]
+        self.checked[path] = fingerprint
+        return fingerprint
+
+    def findTemplate(self, dirs, name):
+        for dir in dirs:
+            path = os.path.join(dir, name)
+            if os.path.isfile(path):
+                return path
+        return ""
+
+    def templateDependencies(self, dirs, name):
+        # returns the template file and all files it includes or extends
+        key = (tuple(dirs), name)
+        if key in self.template_deps:
+            return self.template_deps[key]
+        self.template_deps[key] = []
+        result = []
+        path = self.findTemplate(dirs, name)
+        if path:
+            result.append(path)
+            with open(path, "r", errors="replace") as f:
+                source = f.read()
+            for match in re.finditer(r"{%\s*(?:include|extends)\s+[\"']([^\"']+)[\"']", source):
+                for dep in self.templateDependencies(dirs, match.group(1)):
+                    if dep not in result:
+                        result.append(dep)
+        self.template_deps[key] = result
+        return result
+
+    def templatesContain(self, dirs, name, pattern):
+        for path in self.templateDependencies(dirs, name):
+            if self.fileContains(path, pattern):
+                return True
+        return False
+
+    def fileContains(self, path, pattern):
+        try:
+            with open(path, "r", errors="replace") as f:
+                return re.search(pattern, f.read()) is not None
+        except OSError:
+            return False
+
+    def isUpToDate(self, output, deps, site_dir):
+        if not os.path.exists(os.path.join(site_dir, output)):
+            return False
+        entry = self.outputs.get(output)
+        if not entry:
+            return False
+        return entry == deps
+
+    def dependencies(self, output):
+        return self.outputs.get(output, {})
+
+    def setDependencies(self, output, deps):
+        self.outputs[output] = deps
+
+    def removeOutput(self, output):
+        self.outputs.pop(output, None)
+
+    def outputNames(self):
+        return list(self.outputs.keys())
+
+    def installedPluginVersion(self, class_name):
+        return self.plugins.get(class_name)
+
+    def setInstalledPlugin(self, class_name, version):
+        self.plugins[class_name] = version
+
+    def clearInstalledPlugins(self):
+        self.plugins = {}
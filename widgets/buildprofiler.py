@@ -0,0 +1,94 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import json
+import os
+import time
+
+
+# Measures the phases of a build and the time spent on every page,
+# split into body html, jinja, django layout and file write.
+class BuildProfiler:
+    page_steps = ["body", "jinja", "django", "write"]
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.last = self.started
+        self.total = 0.0
+        self.phases = {}
+        self.pages = {}
+
+    def lap(self, phase):
+        # adds the time since the previous lap to the phase
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+    def addPageTime(self, url, step, seconds):
+        page = self.pages.setdefault(url, {})
+        page[step] = page.get(step, 0.0) + seconds
+
+    def addPageTimes(self, url, timings):
+        for step, seconds in timings.items():
+            self.addPageTime(url, step, seconds)
+
+    def finish(self):
+        self.lap("save")
+        self.total = self.last - self.started
+
+    def pageTotal(self, url):
+        return sum(self.pages[url].values())
+
+    def slowestPages(self, count = 10):
+        return sorted(self.pages, key=self.pageTotal, reverse=True)[:count]
+
+    def report(self):
+        data = {}
+        data["total"] = self.total
+        data["phases"] = self.phases
+        pages = {}
+        for url, steps in self.pages.items():
+            page = dict(steps)
+            page["total"] = self.pageTotal(url)
+            pages[url] = page
+        data["pages"] = pages
+        data["slowest"] = self.slowestPages()
+        return data
+
+    def save(self, filename):
+        dir = os.path.dirname(filename)
+        if dir:
+            os.makedirs(dir, exist_ok=True)
+        with open(filename, "w") as f:
+            json.dump(self.report(), f, indent=4, sort_keys=True)
+
+    def summary(self, count = 10):
+        lines = []
+        lines.append("Build took %.3fs" % self.total)
+        for phase, seconds in sorted(self.phases.items(), key=lambda p: p[1], reverse=True):
+            lines.append("  %-14s %8.3fs" % (phase, seconds))
+        if self.pages:
+            lines.append("Slowest pages:")
+            lines.append("  %8s %8s %8s %8s %8s  %s" % ("total", "body", "jinja", "django", "write", "url"))
+            for url in self.slowestPages(count):
+                steps = self.pages[url]
+                times = tuple(steps.get(step, 0.0) for step in BuildProfiler.page_steps)
+                lines.append("  %8.4f %8.4f %8.4f %8.4f %8.4f  %s" % ((self.pageTotal(url),) + times + (url,)))
+        return "\n".join(lines)
@@ -57,11 +57,11 @@ class Column(Item):
             item.save(f, indent + 4)
         f.write(" " * indent + "}\n")
 
-    def getHtml(self):
-        html = "<div class=\"col-md-" + str(self._span) + "\">\n"
+    def writeHtml(self, f):
+        f.write("<div class=\"col-md-" + str(self._span) + "\">\n")
         for item in self._items:
-            html += item.getHtml()
-        return html + "\n</div>\n"
+            item.writeHtml(f)
+        f.write("\n</div>\n")
 
     def collectTagNames(self, list):
         for item in self._items:
@@ -33,7 +33,6 @@ from widgets.columneditor import ColumnEditor
 from widgets.content import ContentType
 from widgets.elementeditor import ElementEditor, Mode
 from widgets.flatbutton import FlatButton
-from widgets.generator import Generator
 from widgets.hyperlink import HyperLink
 from widgets.pageeditor import PageEditor
 from widgets.roweditor import RowEditor
@@ -64,9 +63,7 @@ class ChangeContentCommand(QUndoCommand):
             os.remove(self.content_editor.filename)
         shutil.copy(self.temp_filename, self.content_editor.filename)
         self.content_editor.load()
-
-        gen = Generator()
-        gen.generateSite(self.win, self.content_editor.site, self.content_editor.content)
+        self.win.contentEdited(self.content_editor.content)
 
     def redo(self):
         if os.path.exists(self.redo_filename):
@@ -78,9 +75,7 @@ class ChangeContentCommand(QUndoCommand):
             shutil.copy(self.content_editor.filename, self.temp_filename)
             self.content_editor.save()
             shutil.copy(self.content_editor.filename, self.redo_filename)
-        
-        gen = Generator()
-        gen.generateSite(self.win, self.content_editor.site, self.content_editor.content)
+        self.win.contentEdited(self.content_editor.content)
 
 
 class RenameContentCommand(QUndoCommand):
@@ -0,0 +1,122 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import gzip
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXTENSIONS = (".html", ".css", ".js", ".svg")
+MIN_SIZE = 256
+
+
+def compressFile(filename):
+    # the siblings get the mtime of the output, which tells the next build they are up to date
+    try:
+        st = os.stat(filename)
+        with open(filename, "rb") as f:
+            data = f.read()
+        siblings = [(filename + ".gz", gzip.compress(data, 9, mtime=0))]
+        if brotli:
+            siblings.append((filename + ".br", brotli.compress(data)))
+        for sibling, compressed in siblings:
+            tmp = sibling + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(compressed)
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.replace(tmp, sibling)
+    except OSError:
+        type, value, traceback = sys.exc_info()
+        return ["Compress failed: Unable to compress " + filename, str(type), str(value)]
+    return None
+
+
+# Writes gzip and, when the brotli module is installed, brotli compressed
+# siblings of the html, css, js and svg files of the site, so a web server can
+# send them without compressing them on every request. Only files whose
+# siblings are missing or older than the file itself are compressed.
+class Compressor:
+    min_parallel_files = 16
+
+    def __init__(self, site_dir, workers = 1):
+        self.site_dir = site_dir
+        self.workers = workers
+
+    def suffixes(self):
+        return [".gz", ".br"] if brotli else [".gz"]
+
+    def isUpToDate(self, filename, mtime_ns):
+        for suffix in self.suffixes():
+            try:
+                if os.stat(filename + suffix).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def clear(self):
+        # removes the siblings when compression has been turned off, so they never get out of date
+        for root, dirs, names in os.walk(self.site_dir):
+            if ".git" in dirs:
+                dirs.remove(".git")
+            for name in names:
+                if name.endswith((".gz", ".br")) and name[:-3].endswith(EXTENSIONS):
+                    os.remove(os.path.join(root, name))
+
+    def compress(self):
+        files = []
+        for root, dirs, names in os.walk(self.site_dir):
+            if ".git" in dirs:
+                dirs.remove(".git")
+            for name in names:
+                filename = os.path.join(root, name)
+                if name.endswith((".gz", ".br")):
+                    # siblings of removed files
+                    if name[:-3].endswith(EXTENSIONS) and not os.path.exists(filename[:-3]):
+                        os.remove(filename)
+                    continue
+                if not name.endswith(EXTENSIONS):
+                    continue
+                st = os.stat(filename)
+                if st.st_size < MIN_SIZE:
+                    # siblings of a file which has become too small would be served with the old content
+                    for suffix in (".gz", ".br"):
+                        if os.path.exists(filename + suffix):
+                            os.remove(filename + suffix)
+                    continue
+                if self.isUpToDate(filename, st.st_mtime_ns):
+                    continue
+                files.append(filename)
+
+        # zlib and brotli release the GIL while compressing, so threads are enough
+        if self.workers > 1 and len(files) >= Compressor.min_parallel_files:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(compressFile, files))
+        else:
+            results = [compressFile(filename) for filename in files]
+        for error in results:
+            if error:
+                print(*error)
+        return files
@@ -0,0 +1,248 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+from django.template import Context, Engine, TemplateDoesNotExist
+from django.utils.safestring import mark_safe
+from jinja2 import BaseLoader, Environment, FileSystemBytecodeCache
+import hashlib
+from widgets.fingerprinter import rewriteReferences
+from widgets.minifier import minifyHtml
+from widgets.postindex import sortPosts
+import os
+import re
+import sys
+import time
+
+NEWLINES = re.compile(r"\r\n|\r")
+
+# used for the blog listings when neither the site nor the theme has a postlist.html
+POST_LIST_TEMPLATE = """<section class="container">
+<h1>{{ listing.title }}</h1>
+{% for post in listing.posts %}
+<article>
+<h2><a href="{{ post.url }}">{{ post.title }}</a></h2>
+<p class="text-muted">{{ post.date }}{% if post.author %} {{ post.author }}{% endif %}</p>
+{% if post.excerpt %}<p>{{ post.excerpt }}</p>{% endif %}
+</article>
+{% endfor %}
+{% if listing.count > 1 %}
+<nav>
+<ul class="pager">
+{% if listing.previous %}<li class="previous"><a href="{{ listing.previous }}">Newer posts</a></li>{% endif %}
+{% if listing.next %}<li class="next"><a href="{{ listing.next }}">Older posts</a></li>{% endif %}
+</ul>
+</nav>
+{% endif %}
+</section>
+"""
+
+
+# Plain copies of Content and Site, so pages can be rendered in worker processes.
+# QObjects can not be pickled.
+class ContentSnapshot:
+    def __init__(self, content):
+        self.title = content.title
+        self.menu = content.menu
+        self.author = content.author
+        self.excerpt = content.excerpt
+        self.keywords = content.keywords
+        self.script = content.script
+        self.layout = content.layout
+        self.date = content.date
+        self.logo = content.logo
+        self.language = content.language
+        self.source = content.source
+        self.attributes = dict(content.attributes)
+        self._url = content.url()
+
+    def url(self):
+        return self._url
+
+
+class SiteSnapshot:
+    def __init__(self, site):
+        self.title = site.title
+        self.description = site.description
+        self.theme = site.theme
+        self.copyright = site.copyright
+        self.keywords = site.keywords
+        self.author = site.author
+        self.logo = site.logo
+        self.publisher = site.publisher
+        self.url = site.url
+        self.source_path = site.source_path
+        self.deploy_path = site.deploy_path
+        self.attributes = dict(site.attributes)
+        self.pages = [ContentSnapshot(page) for page in site.pages]
+        self.posts = [ContentSnapshot(post) for post in sortPosts(site.posts)]
+
+
+# Page bodies are loaded as templates named by the hash of their source,
+# so the environment and the bytecode cache can keep them like template files.
+class BodyLoader(BaseLoader):
+    def __init__(self):
+        self.sources = {}
+
+    def get_source(self, environment, name):
+        return self.sources.pop(name), None, lambda: True
+
+
+class ContentRenderer:
+    body_cache_size = 400
+
+    def __init__(self, site_dir, dirs, sitevars, themevars, menus, site, debug=True, bytecode_dir=None, minify=False):
+        self.site_dir = site_dir
+        self.dirs = dirs
+        self.sitevars = sitevars
+        self.themevars = themevars
+        self.menus = menus
+        self.site = site
+        self.debug = debug
+        self.bytecode_dir = bytecode_dir
+        self.minify = minify
+        self.fingerprints = {}
+        self.engine = None
+        self.jinja = None
+
+    def __getstate__(self):
+        # every worker process compiles the templates with its own engine
+        state = self.__dict__.copy()
+        state["engine"] = None
+        state["jinja"] = None
+        return state
+
+    def templateEngine(self):
+        # one engine per build, the cached loader compiles each layout and include only once
+        if not self.engine:
+            loaders = [("django.template.loaders.cached.Loader", ["django.template.loaders.filesystem.Loader"])]
+            self.engine = Engine(dirs = self.dirs, debug=self.debug, loaders=loaders)
+        return self.engine
+
+    def jinjaEnvironment(self):
+        if not self.jinja:
+            bytecode_cache = None
+            if self.bytecode_dir:
+                os.makedirs(self.bytecode_dir, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(self.bytecode_dir)
+            self.jinja = Environment(loader=BodyLoader(), cache_size=ContentRenderer.body_cache_size, bytecode_cache=bytecode_cache)
+        return self.jinja
+
+    def renderListing(self, listing, context):
+        eng = self.templateEngine()
+        try:
+            template = eng.get_template("postlist.html")
+        except TemplateDoesNotExist:
+            template = eng.from_string(POST_LIST_TEMPLATE)
+        with context.push(listing=listing):
+            return template.render(context)
+
+    def renderBody(self, body, ctx):
+        if "{{" not in body and "{%" not in body and "{#" not in body:
+            # nothing to render, only normalize the newlines like jinja does
+            text = NEWLINES.sub("\n", body)
+            if text.endswith("\n"):
+                text = text[:-1]
+            return text
+        env = self.jinjaEnvironment()
+        name = hashlib.sha1(body.encode("utf-8")).hexdigest()
+        env.loader.sources[name] = body
+        try:
+            tmp = env.get_template(name)
+        finally:
+            env.loader.sources.pop(name, None)
+        return tmp.render(ctx)
+
+    def renderPage(self, job):
+        # returns the html of the page and the time spent on each step
+        output, content, timings = self.renderParts(job)
+        return output, timings
+
+    def renderParts(self, job):
+        # returns the html of the page, the html of its content and the time spent on each step
+        timings = {}
+        eng = self.templateEngine()
+        context = Context()
+        context["site"] = self.sitevars
+        context["theme"] = self.themevars
+
+        pluginvars = {}
+        pluginvars["styles"] = mark_safe(job["styles"])
+        pluginvars["scripts"] = mark_safe(job["scripts"])
+        context["plugin"] = pluginvars
+        cm = dict(job["page"])
+        cm["menuitems"] = self.menus.get(job["menu"], [])
+        context["page"] = cm
+
+        started = time.perf_counter()
+        if job.get("listing"):
+            xhtml = self.renderListing(job["listing"], context)
+        else:
+            ctx = {}
+            ctx["page"] = job["snapshot"]
+            ctx["site"] = self.site
+            xhtml = self.renderBody(job["body"], ctx)
+        context["content"] = mark_safe(xhtml)
+        timings["jinja"] = time.perf_counter() - started
+
+        started = time.perf_counter()
+        output = eng.render_to_string(job["layout"] + ".html", context=context)
+        timings["django"] = time.perf_counter() - started
+        return output, xhtml, timings
+
+    def render(self, job):
+        # returns the error, if any, the time spent on each step and the rendered
+        # content of a page for the search index, listings only repeat their posts
+        timings = {}
+        outputfile = os.path.join(self.site_dir, job["url"])
+
+        try:
+            output, content, timings = self.renderParts(job)
+            output = rewriteReferences(output, self.fingerprints)
+            if self.minify:
+                started = time.perf_counter()
+                output = minifyHtml(output)
+                timings["minify"] = time.perf_counter() - started
+            # readers of the site directory never see a half written page
+            tmp = outputfile + ".tmp"
+            started = time.perf_counter()
+            with open(tmp, 'w') as f:
+                f.write(output)
+            os.replace(tmp, outputfile)
+            timings["write"] = time.perf_counter() - started
+        except:
+            type, value, traceback = sys.exc_info()
+            if os.path.exists(outputfile + ".tmp"):
+                os.remove(outputfile + ".tmp")
+            msg = "Generate content failed: Unable to create file " + outputfile
+            return [msg, str(type), str(value)], timings, ""
+        return None, timings, "" if job.get("listing") else content
+
+
+# the renderer is sent once to every worker process and not once per page
+worker_renderer = None
+
+
+def initWorker(renderer):
+    global worker_renderer
+    worker_renderer = renderer
+
+
+def renderInWorker(job):
+    return worker_renderer.render(job)
@@ -0,0 +1,416 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+from widgets.assetbundler import BUNDLE_DIR
+from widgets.fingerprinter import HASHED_NAME
+
+VERSION = 1
+# classes which scripts add in the browser from names they put together themselves
+SAFELIST = [
+    # RevolutionSlider builds its slots, captions, arrows and bullets
+    r"tp-.*", r"rev.*", r"rs-.*", r"slot.*", r"defaultimg", r"caption", r"tparrows", r"bullets?", r"selected", r"hide(arrows|bullets)", r"spinner.*",
+    # animate.css animations started by scripts
+    r"animated", r"infinite", r"delay-.*", r"(fast|faster|slow|slower)",
+    # states the bootstrap and theme scripts take from variables
+    r"(in|active|open|next|prev|left|right|item)"
+]
+SAFE = re.compile("(?:" + "|".join(SAFELIST) + r")\Z")
+PLUGIN_DIR = "assets/plugins/"
+# rules containing other rules, their content is pruned on its own
+GROUP_RULES = ("media", "supports", "document", "-moz-document", "layer", "container")
+
+TAG = re.compile(r"<([a-zA-Z][a-zA-Z0-9-]*)")
+ATTRIBUTE = re.compile(r"""(?<![\w-])(class|id)\s*=\s*(?:\\?["']([^"'\\]*)|([^\s"'\\>]+))""", re.I)
+CLASS_CALL = re.compile(r"""(?:addClass|toggleClass|classList\.(?:add|toggle))\(\s*["']([^"']*)["']|className\s*\+?=\s*["']([^"']*)["']""")
+COMMENT = re.compile(r"/\*.*?\*/", re.S)
+ATTRIBUTE_SELECTOR = re.compile(r"\[[^\]]*\]")
+PSEUDO_FUNCTION = re.compile(r"::?[\w-]+\([^()]*\)")
+PSEUDO = re.compile(r"::?[\w-]+")
+SIMPLE_SELECTOR = re.compile(r"([.#]?)((?:[\w-]|\\[0-9a-fA-F]{1,6}\s?|\\.|[^\x00-\x7f])+)")
+CSS_ESCAPE = re.compile(r"\\(?:([0-9a-fA-F]{1,6})\s?|(.))")
+
+
+def markupTokens(text):
+    # tag names, .classes and #ids found in pages, templates and scripts
+    tokens = set(m.group(1).lower() for m in TAG.finditer(text))
+    for m in ATTRIBUTE.finditer(text):
+        prefix = "." if m.group(1).lower() == "class" else "#"
+        tokens.update(prefix + value for value in (m.group(2) or m.group(3) or "").split())
+    for m in CLASS_CALL.finditer(text):
+        tokens.update("." + value for value in (m.group(1) or m.group(2)).split())
+    return tokens
+
+
+def unescape(name):
+    return CSS_ESCAPE.sub(lambda m: chr(min(int(m.group(1), 16), 0x10ffff)) if m.group(1) else m.group(2), name)
+
+
+def skipComment(css, pos):
+    end = css.find("*/", pos + 2)
+    return len(css) if end < 0 else end + 2
+
+
+def skipString(css, pos):
+    quote = css[pos]
+    pos += 1
+    while pos < len(css) and css[pos] != quote and css[pos] != "\n":
+        if css[pos] == "\\":
+            pos += 1
+        pos += 1
+    return pos + 1
+
+
+def findEnd(css, pos):
+    # the next { ; or } outside of strings, comments and brackets
+    depth = 0
+    while pos < len(css):
+        c = css[pos]
+        if c == "/" and css.startswith("/*", pos):
+            pos = skipComment(css, pos)
+            continue
+        if c == "\"" or c == "'":
+            pos = skipString(css, pos)
+            continue
+        if c == "\\":
+            pos += 2
+            continue
+        if c in "([":
+            depth += 1
+        elif c in ")]":
+            depth = max(0, depth - 1)
+        elif depth == 0 and c in "{;}":
+            return pos
+        pos += 1
+    return len(css)
+
+
+def blockEnd(css, pos):
+    # the } closing the block opened at pos
+    depth = 0
+    while pos < len(css):
+        c = css[pos]
+        if c == "/" and css.startswith("/*", pos):
+            pos = skipComment(css, pos)
+            continue
+        if c == "\"" or c == "'":
+            pos = skipString(css, pos)
+            continue
+        if c == "\\":
+            pos += 2
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return pos
+        pos += 1
+    return len(css)
+
+
+def splitSelectors(prelude):
+    selectors = []
+    depth = 0
+    start = 0
+    pos = 0
+    while pos < len(prelude):
+        c = prelude[pos]
+        if c == "\"" or c == "'":
+            pos = skipString(prelude, pos)
+            continue
+        if c == "\\":
+            pos += 2
+            continue
+        if c in "([":
+            depth += 1
+        elif c in ")]":
+            depth = max(0, depth - 1)
+        elif c == "," and depth == 0:
+            selectors.append(prelude[start:pos])
+            start = pos + 1
+        pos += 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def selectorUsed(selector, used):
+    # attribute selectors and pseudo classes like :not() are left out, which keeps rules rather than drops them
+    selector = ATTRIBUTE_SELECTOR.sub("", selector)
+    while True:
+        stripped = PSEUDO_FUNCTION.sub("", selector)
+        if stripped == selector:
+            break
+        selector = stripped
+    selector = PSEUDO.sub("", selector)
+    for m in SIMPLE_SELECTOR.finditer(selector):
+        prefix, name = m.group(1), unescape(m.group(2))
+        if not prefix:
+            if name[0].isdigit() or name.lower() in used:
+                continue
+            return False
+        if prefix + name not in used and not SAFE.match(name):
+            return False
+    return True
+
+
+def pruneRules(css, used):
+    # returns the kept rules as pairs of the name of a keyframes rule and the text
+    pieces = []
+    pos = 0
+    while pos < len(css):
+        start = pos
+        # whitespace and comments before the next rule, licence comments /*! */ are kept
+        while pos < len(css):
+            if css[pos].isspace():
+                pos += 1
+            elif css.startswith("/*", pos):
+                end = skipComment(css, pos)
+                if css.startswith("/*!", pos):
+                    pieces.append(("", css[start:end]))
+                    start = end
+                pos = end
+            else:
+                break
+        if pos >= len(css):
+            break
+        end = findEnd(css, pos)
+        if end >= len(css) or css[end] == ";":
+            # statements like @charset and @import
+            pieces.append(("", css[start:end + 1]))
+            pos = end + 1
+            continue
+        if css[end] == "}":
+            pos = end + 1
+            continue
+        close = blockEnd(css, end)
+        prelude = COMMENT.sub("", css[pos:end]).strip()
+        text = css[start:close + 1]
+        pos = close + 1
+        if prelude.startswith("@"):
+            name = re.match(r"@([\w-]*)", prelude).group(1).lower()
+            if name in GROUP_RULES:
+                inner = "".join(piece for kind, piece in pruneRules(css[end + 1:close], used))
+                if COMMENT.sub("", inner).strip():
+                    pieces.append(("", css[start:end + 1] + inner + "}"))
+            elif name.endswith("keyframes"):
+                pieces.append((prelude[len(name) + 1:].strip().strip("\"'"), text))
+            else:
+                # @font-face, @page and others
+                pieces.append(("", text))
+        elif any(selectorUsed(selector, used) for selector in splitSelectors(prelude)):
+            pieces.append(("", text))
+    return pieces
+
+
+def pruneCss(css, used):
+    # used contains tag names, .classes and #ids, keyframes are kept while a kept rule names them
+    pieces = pruneRules(css, used)
+    kept = "".join(text for name, text in pieces if not name)
+    return "".join(text for name, text in pieces if not name or re.search(r"(?<![\w-])" + re.escape(name) + r"(?![\w-])", kept))
+
+
+# Removes the rules from the stylesheets of the site whose selectors match
+# nothing in the rendered pages, the templates of the site and the theme and
+# the scripts, which also catches markup of the plugins and of scripts.
+# Classes which scripts put together themselves are kept by the safelist.
+# The originals are kept in the cache, the pruned stylesheets are cached by
+# the hash of the original and the used names, so a stylesheet is only pruned
+# again when one of them changes. The names found in a file are kept until
+# its size or mtime changes.
+class CssPruner:
+
+    def __init__(self, site_dir, cache_dir):
+        self.site_dir = site_dir
+        self.cache_dir = cache_dir
+        self.filename = os.path.join(cache_dir, "prunecss.json")
+        self.store = os.path.join(cache_dir, "prunecss")
+        self.sources = {}
+        self.outputs = {}
+
+    def load(self):
+        try:
+            with open(self.filename, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") != VERSION:
+            data = {}
+        self.sources = data.get("sources", {})
+        self.outputs = data.get("outputs", {})
+
+    def save(self):
+        # originals of an earlier build are needed until the build using new ones has been kept
+        self.removeStale()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = {}
+        data["version"] = VERSION
+        data["sources"] = self.sources
+        data["outputs"] = self.outputs
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, sort_keys=True)
+        os.replace(tmp, self.filename)
+
+    def inputs(self, template_dirs):
+        # rendered pages and scripts by their name in the site, templates by their path
+        files = []
+        for root, dirs, names in os.walk(self.site_dir):
+            dirs[:] = [d for d in dirs if d != ".git"]
+            for file in names:
+                if file.endswith((".html", ".htm", ".js")) and not self.isHashed(root, file):
+                    filename = os.path.join(root, file)
+                    files.append((posixpath.join(*os.path.relpath(filename, self.site_dir).split(os.sep)), filename))
+        for dir in template_dirs:
+            for root, dirs, names in os.walk(dir):
+                for file in names:
+                    files.append((os.path.join(root, file), os.path.join(root, file)))
+        return files
+
+    def isHashed(self, root, file):
+        # copies made by the fingerprinter have the same content as their originals
+        m = HASHED_NAME.match(file)
+        return m is not None and os.path.exists(os.path.join(root, m.group(1) + m.group(2)))
+
+    def usedNames(self, template_dirs):
+        used = set()
+        sources = {}
+        for name, filename in self.inputs(template_dirs):
+            try:
+                st = os.stat(filename)
+                entry = self.sources.get(name)
+                if not entry or entry[0] != st.st_mtime_ns or entry[1] != st.st_size:
+                    with open(filename, "r", encoding="utf-8", errors="replace") as f:
+                        entry = [st.st_mtime_ns, st.st_size, sorted(markupTokens(f.read()))]
+            except OSError:
+                continue
+            sources[name] = entry
+            used.update(entry[2])
+        self.sources = sources
+        return used
+
+    def stylesheets(self, exclude):
+        names = []
+        for root, dirs, files in os.walk(os.path.join(self.site_dir, "assets")):
+            for file in files:
+                name = posixpath.join(*os.path.relpath(os.path.join(root, file), self.site_dir).split(os.sep))
+                # bundles are named by the hash of their content
+                if not file.endswith(".css") or self.isHashed(root, file) or name.startswith(BUNDLE_DIR + "/") or name.startswith(exclude):
+                    continue
+                names.append(name)
+        return sorted(names)
+
+    def isOutput(self, name):
+        # the file is still the pruned one, not a new original copied by the asset sync or a plugin
+        entry = self.outputs.get(name)
+        try:
+            st = os.stat(os.path.join(self.site_dir, name))
+        except OSError:
+            return False
+        return entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size and os.path.exists(self.original(entry[2]))
+
+    def original(self, sha):
+        return os.path.join(self.store, sha + ".css")
+
+    def run(self, template_dirs, exclude = ()):
+        # returns the names of the stylesheets which have changed
+        used = self.usedNames(template_dirs)
+        digest = hashlib.sha1("\n".join([str(VERSION)] + SAFELIST + sorted(used)).encode("utf-8")).hexdigest()
+        changed = []
+        outputs = {}
+        for name in self.stylesheets(exclude):
+            filename = os.path.join(self.site_dir, name)
+            try:
+                if self.isOutput(name):
+                    sha = self.outputs[name][2]
+                    if self.outputs[name][3] == digest:
+                        outputs[name] = self.outputs[name]
+                        continue
+                else:
+                    with open(filename, "rb") as f:
+                        data = f.read()
+                    sha = hashlib.sha1(data).hexdigest()
+                    if not os.path.exists(self.original(sha)):
+                        self.writeFile(self.original(sha), data)
+                key = hashlib.sha1((sha + digest).encode("utf-8")).hexdigest()
+                pruned = os.path.join(self.store, key + ".pruned.css")
+                if os.path.exists(pruned):
+                    with open(pruned, "rb") as f:
+                        data = f.read()
+                else:
+                    with open(self.original(sha), "r", encoding="utf-8", errors="surrogateescape") as f:
+                        data = pruneCss(f.read(), used).encode("utf-8", errors="surrogateescape")
+                    self.writeFile(pruned, data)
+                with open(filename, "rb") as f:
+                    if f.read() != data:
+                        self.writeFile(filename, data)
+                        changed.append(name)
+                st = os.stat(filename)
+                outputs[name] = [st.st_mtime_ns, st.st_size, sha, digest]
+            except OSError:
+                type, value, traceback = sys.exc_info()
+                print("Unable to prune " + name, type, value, traceback)
+        self.restore([name for name in self.outputs if name not in outputs])
+        self.outputs = outputs
+        return changed
+
+    def restore(self, names):
+        # puts the originals back, files replaced since they were pruned are left as they are
+        for name in names:
+            if self.isOutput(name):
+                with open(self.original(self.outputs[name][2]), "rb") as f:
+                    self.writeFile(os.path.join(self.site_dir, name), f.read())
+            self.outputs.pop(name, None)
+
+    def restoreExcluded(self, exclude):
+        self.restore([name for name in self.outputs if name.startswith(exclude)])
+
+    def clear(self):
+        # when pruning has been turned off
+        self.restore(list(self.outputs))
+        self.sources = {}
+        if os.path.isdir(self.store):
+            shutil.rmtree(self.store)
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def removeStale(self):
+        # originals and pruned stylesheets which are not used any more
+        wanted = set()
+        for entry in self.outputs.values():
+            wanted.add(entry[2] + ".css")
+            wanted.add(hashlib.sha1((entry[2] + entry[3]).encode("utf-8")).hexdigest() + ".pruned.css")
+        if os.path.isdir(self.store):
+            for file in os.listdir(self.store):
+                if file not in wanted:
+                    os.remove(os.path.join(self.store, file))
+
+    def writeFile(self, filename, data):
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, filename)
@@ -0,0 +1,167 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import filecmp
+import os
+import re
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+SITEMAP_LIMIT = 50000
+FEED_SIZE = 20
+
+
+# Writes the sitemap and the RSS and Atom feeds of the posts. Entries are
+# written one at a time into a temporary file, so the memory needed does not
+# grow with the size of the site. A file is only replaced when its content has
+# changed, otherwise the old file and its mtime are kept.
+class Feeds:
+
+    def __init__(self, site_dir, base_url, limit = SITEMAP_LIMIT, assets = ()):
+        self.site_dir = site_dir
+        self.base_url = base_url.rstrip("/") + "/"
+        self.limit = limit
+        # files of the site itself, like a sitemap-1.xml in its content, are never removed
+        self.assets = assets
+        self.written = []
+
+    def absoluteUrl(self, url):
+        return self.base_url + url.lstrip("/")
+
+    def writeFile(self, name, lines):
+        filename = os.path.join(self.site_dir, name)
+        tmp = filename + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(line)
+        self.replaceFile(tmp, filename)
+
+    def replaceFile(self, tmp, filename):
+        if os.path.exists(filename) and filecmp.cmp(tmp, filename, shallow=False):
+            os.remove(tmp)
+            return
+        os.replace(tmp, filename)
+        self.written.append(os.path.basename(filename))
+
+    def writeSitemap(self, entries):
+        # entries are (url, date) pairs, date is an ISO date or empty
+        # a sitemap may contain 50,000 urls, bigger sites get a sitemap index with one sitemap per part
+        part = 0
+        f = None
+        count = 0
+        for url, date in entries:
+            if f is None or count == self.limit:
+                if f:
+                    self.closeSitemap(f)
+                part += 1
+                f = open(os.path.join(self.site_dir, "sitemap-%d.xml.tmp" % part), "w", encoding="utf-8")
+                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+                f.write('<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+                count = 0
+            f.write("<url><loc>" + escape(self.absoluteUrl(url)) + "</loc>")
+            if date:
+                f.write("<lastmod>" + date + "</lastmod>")
+            f.write("</url>\n")
+            count += 1
+        if f:
+            self.closeSitemap(f)
+
+        if part == 0:
+            self.writeFile("sitemap.xml", ['<?xml version="1.0" encoding="UTF-8"?>\n', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n', "</urlset>\n"])
+        elif part == 1:
+            self.replaceFile(os.path.join(self.site_dir, "sitemap-1.xml.tmp"), os.path.join(self.site_dir, "sitemap.xml"))
+        else:
+            for number in range(1, part + 1):
+                name = "sitemap-%d.xml" % number
+                self.replaceFile(os.path.join(self.site_dir, name + ".tmp"), os.path.join(self.site_dir, name))
+            self.writeFile("sitemap.xml", self.sitemapIndex(part))
+        self.removeStaleParts(part)
+
+    def closeSitemap(self, f):
+        f.write("</urlset>\n")
+        f.close()
+
+    def sitemapIndex(self, parts):
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+        for number in range(1, parts + 1):
+            yield "<sitemap><loc>" + escape(self.absoluteUrl("sitemap-%d.xml" % number)) + "</loc></sitemap>\n"
+        yield "</sitemapindex>\n"
+
+    def removeStaleParts(self, parts):
+        # a single sitemap has no parts, otherwise parts above the current count are left from a bigger site
+        pattern = re.compile(r"sitemap-(\d+)\.xml$")
+        for name in os.listdir(self.site_dir):
+            m = pattern.match(name)
+            if m and (parts <= 1 or int(m.group(1)) > parts) and name not in self.assets:
+                os.remove(os.path.join(self.site_dir, name))
+
+    def writeRss(self, title, description, posts):
+        self.writeFile("feed.xml", self.rssLines(title, description, posts[:FEED_SIZE]))
+
+    def rssLines(self, title, description, posts):
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">\n<channel>\n'
+        yield "<title>" + escape(title) + "</title>\n"
+        yield "<link>" + escape(self.base_url) + "</link>\n"
+        yield "<description>" + escape(description) + "</description>\n"
+        yield '<atom:link href="' + escape(self.absoluteUrl("feed.xml")) + '" rel="self" type="application/rss+xml"/>\n'
+        if posts and posts[0]["date"]:
+            yield "<lastBuildDate>" + self.rfc822(posts[0]["date"]) + "</lastBuildDate>\n"
+        for post in posts:
+            url = escape(self.absoluteUrl(post["url"]))
+            yield "<item><title>" + escape(post["title"]) + "</title><link>" + url + "</link><guid>" + url + "</guid>"
+            if post["date"]:
+                yield "<pubDate>" + self.rfc822(post["date"]) + "</pubDate>"
+            if post["excerpt"]:
+                yield "<description>" + escape(post["excerpt"]) + "</description>"
+            yield "</item>\n"
+        yield "</channel>\n</rss>\n"
+
+    def writeAtom(self, title, author, posts):
+        self.writeFile("atom.xml", self.atomLines(title, author, posts[:FEED_SIZE]))
+
+    def atomLines(self, title, author, posts):
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+        yield "<title>" + escape(title) + "</title>\n"
+        yield "<id>" + escape(self.base_url) + "</id>\n"
+        yield '<link href="' + escape(self.base_url) + '"/>\n'
+        yield '<link href="' + escape(self.absoluteUrl("atom.xml")) + '" rel="self"/>\n'
+        # the feed only changes with its posts, so it is not dated with the time of the build
+        updated = posts[0]["date"] if posts and posts[0]["date"] else "1970-01-01"
+        yield "<updated>" + updated + "T00:00:00Z</updated>\n"
+        if author:
+            yield "<author><name>" + escape(author) + "</name></author>\n"
+        for post in posts:
+            url = escape(self.absoluteUrl(post["url"]))
+            yield "<entry><title>" + escape(post["title"]) + "</title><id>" + url + "</id>"
+            yield '<link href="' + url + '"/>'
+            yield "<updated>" + (post["date"] or updated) + "T00:00:00Z</updated>"
+            if post["author"]:
+                yield "<author><name>" + escape(post["author"]) + "</name></author>"
+            if post["excerpt"]:
+                yield "<summary>" + escape(post["excerpt"]) + "</summary>"
+            yield "</entry>\n"
+        yield "</feed>\n"
+
+    def rfc822(self, date):
+        return format_datetime(datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc))
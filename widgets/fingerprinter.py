@@ -0,0 +1,210 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+HASH_LENGTH = 10
+HASHED_NAME = re.compile(r"^(.*)\.[0-9a-f]{%d}(\.[^.]+)$" % HASH_LENGTH)
+# files which are already named by the hash of their content, like bundles
+HASH_ONLY_NAME = re.compile(r"^[0-9a-f]{%d}\.[^.]+$" % HASH_LENGTH)
+CSS_URL = re.compile(r"""(url\(\s*(['"]?))([^'")\s]+)(\2\s*\))|(@import\s+(['"]))([^'"]+)(\6)""")
+# asset paths in attributes, inline styles and srcset lists of a page in the root of the site
+PAGE_URL = re.compile(r"""(?<=["'(=,\s])(?:\./)?(assets/[^"'()\s,?#]+)""")
+
+
+def hashedName(name, digest):
+    root, ext = posixpath.splitext(name)
+    return root + "." + digest[:HASH_LENGTH] + ext
+
+
+def rewriteReferences(html, fingerprints):
+    # fingerprints map asset names like assets/css/style.css to their hashed names
+    if not fingerprints:
+        return html
+    return PAGE_URL.sub(lambda m: fingerprints.get(posixpath.normpath(m.group(1)), m.group(0)), html)
+
+
+# Copies every file below assets to a name containing the hash of its content,
+# like assets/css/style.3f2a1b9c0d.css, so the files can be served as immutable.
+# References in css files are rewritten before they are hashed, references in
+# pages are rewritten by the renderer. The originals stay in place for
+# references which cannot be rewritten, like urls built by scripts.
+# The sizes and mtimes of the originals are kept in the cache, so unchanged
+# files are not hashed again.
+class Fingerprinter:
+
+    def __init__(self, site_dir, cache_file):
+        self.site_dir = site_dir
+        self.cache_file = cache_file
+        self.cache = {}
+        self.fingerprints = {}
+
+    def load(self):
+        try:
+            with open(self.cache_file, "r") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp = self.cache_file + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.cache, f, sort_keys=True)
+        os.replace(tmp, self.cache_file)
+
+    def clear(self):
+        # removes the hashed copies when fingerprinting has been turned off
+        for entry in self.cache.values():
+            if os.path.exists(os.path.join(self.site_dir, entry[2])):
+                os.remove(os.path.join(self.site_dir, entry[2]))
+        if os.path.exists(os.path.join(self.site_dir, "assets", "manifest.json")):
+            os.remove(os.path.join(self.site_dir, "assets", "manifest.json"))
+        self.cache = {}
+        if os.path.exists(self.cache_file):
+            os.remove(self.cache_file)
+
+    def run(self):
+        known = set(entry[2] for entry in self.cache.values())
+        originals = []
+        hashed = []
+        for root, dirs, files in os.walk(os.path.join(self.site_dir, "assets")):
+            for file in files:
+                name = posixpath.join(*os.path.relpath(os.path.join(root, file), self.site_dir).split(os.sep))
+                if name == "assets/manifest.json" or file.endswith((".tmp", ".gz", ".br")):
+                    continue
+                m = HASHED_NAME.match(name)
+                if m and (name in known or os.path.exists(os.path.join(self.site_dir, m.group(1) + m.group(2)))):
+                    hashed.append(name)
+                else:
+                    originals.append(name)
+
+        self.fingerprints = {}
+        old = self.cache
+        self.cache = {}
+        # css files are done last, they refer to the hashed names of images and fonts
+        originals.sort(key=lambda name: (name.endswith(".css"), name))
+        for name in originals:
+            try:
+                self.fingerprint(name, old.get(name))
+            except OSError:
+                type, value, traceback = sys.exc_info()
+                print("Fingerprint failed: Unable to copy " + name, type, value, traceback)
+
+        # hashed copies of removed or changed assets
+        current = set(self.fingerprints.values())
+        for name in hashed:
+            if name not in current:
+                os.remove(os.path.join(self.site_dir, name))
+        self.writeManifest()
+        return self.fingerprints
+
+    def fingerprint(self, name, entry):
+        filename = os.path.join(self.site_dir, name)
+        st = os.stat(filename)
+        if HASH_ONLY_NAME.match(posixpath.basename(name)):
+            self.fingerprints[name] = name
+            return
+        if name.endswith(".css"):
+            with open(filename, "rb") as f:
+                data = f.read()
+            try:
+                data = self.rewriteCss(name, data.decode("utf-8")).encode("utf-8")
+            except UnicodeDecodeError:
+                pass
+            target = hashedName(name, hashlib.sha1(data).hexdigest())
+            if not os.path.exists(os.path.join(self.site_dir, target)):
+                self.writeFile(os.path.join(self.site_dir, target), data)
+        else:
+            if entry and entry[0] == st.st_size and entry[1] == st.st_mtime_ns and os.path.exists(os.path.join(self.site_dir, entry[2])):
+                target = entry[2]
+            else:
+                sha = hashlib.sha1()
+                with open(filename, "rb") as f:
+                    for chunk in iter(lambda: f.read(65536), b""):
+                        sha.update(chunk)
+                target = hashedName(name, sha.hexdigest())
+                if not os.path.exists(os.path.join(self.site_dir, target)):
+                    self.linkFile(filename, os.path.join(self.site_dir, target))
+        self.fingerprints[name] = target
+        self.cache[name] = [st.st_size, st.st_mtime_ns, target]
+
+    def replaceReferences(self, old, pages):
+        # pages rendered before the hashed names have changed, like after stylesheets have been pruned
+        renamed = {old[name]: target for name, target in self.fingerprints.items() if name in old and old[name] != target}
+        if not renamed:
+            return
+        pattern = re.compile("|".join(re.escape(name) for name in renamed))
+        for page in pages:
+            filename = os.path.join(self.site_dir, page)
+            try:
+                with open(filename, "r", encoding="utf-8") as f:
+                    html = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            replaced = pattern.sub(lambda m: renamed[m.group(0)], html)
+            if replaced != html:
+                self.writeFile(filename, replaced.encode("utf-8"))
+
+    def rewriteCss(self, name, css):
+        dir = posixpath.dirname(name)
+
+        def replace(m):
+            prefix, url, suffix = (m.group(1), m.group(3), m.group(4)) if m.group(1) else (m.group(5), m.group(7), m.group(8))
+            if url.startswith(("data:", "http:", "https:", "//", "#", "/")):
+                return m.group(0)
+            # queries and fragments like font.eot?#iefix are kept
+            path, rest = re.match(r"([^?#]*)(.*)", url).groups()
+            target = self.fingerprints.get(posixpath.normpath(posixpath.join(dir, path)))
+            if not target:
+                return m.group(0)
+            return prefix + posixpath.relpath(target, dir) + rest + suffix
+
+        return CSS_URL.sub(replace, css)
+
+    def linkFile(self, filename, target):
+        # a hardlink is enough, the original is replaced and never written to by the asset sync
+        try:
+            os.link(filename, target)
+        except OSError:
+            shutil.copy2(filename, target)
+
+    def writeFile(self, filename, data):
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, filename)
+
+    def writeManifest(self):
+        data = json.dumps(self.fingerprints, sort_keys=True, indent=1).encode("utf-8")
+        filename = os.path.join(self.site_dir, "assets", "manifest.json")
+        try:
+            with open(filename, "rb") as f:
+                if f.read() == data:
+                    return
+        except OSError:
+            pass
+        self.writeFile(filename, data)
@@ -18,22 +18,63 @@
 #
 #############################################################################
 
-from django.template import Context, Engine
-from django.utils.safestring import mark_safe
+from concurrent.futures import ProcessPoolExecutor
+from widgets.assetbundler import AssetBundler
+from widgets.assetsync import AssetSync
+from widgets.buildcache import BuildCache
+from widgets.buildprofiler import BuildProfiler
+from widgets.compressor import Compressor
 from widgets.content import ContentType
+from widgets.contentrenderer import ContentRenderer, ContentSnapshot, SiteSnapshot, initWorker, renderInWorker
+from widgets.csspruner import CssPruner, PLUGIN_DIR
+from widgets.feeds import Feeds
+from widgets.fingerprinter import Fingerprinter
+from widgets.imagederivatives import ImageDerivatives
+from widgets.imageindex import ImageIndex
+from widgets.minifier import Minifier
 from widgets.plugins import Plugins
+from widgets.postindex import PostIndex, POSTS_PER_PAGE, sortPosts
+from widgets.searchindex import SearchIndex
+from widgets.stagedoutput import StagedOutput
+import multiprocessing
 import os
 import shutil
-import sys
 import html
-from jinja2 import Template
+import io
+import time
 
+# variables of the site which change with the list of pages and posts
+LIST_VARS = ["pages", "posts", "recent_posts", "archives"]
+LISTS = r"site\.(" + "|".join(LIST_VARS) + ")"
 
 class Generator:
     install_directory = ""
+    min_parallel_jobs = 16
 
     def __init__(self):
-        self.content = ""
+        self.posts_per_page = POSTS_PER_PAGE
+        self.base_url = ""
+        self.search = True
+        self.minify = False
+        self.fingerprint = False
+        self.compress = False
+        self.responsive_images = True
+        self.bundle = False
+        self.prune_css = False
+        self.bundler = None
+        self.search_index = None
+        self.post_index = None
+        self.incremental = False
+        self.staged = False
+        self.debug = True
+        self.bytecode_cache = False
+        self.link_mode = AssetSync.COPY
+        self.checksum = False
+        self.workers = os.cpu_count() or 1
+        self.cache = None
+        self.assets = None
+        self.renderer = None
+        self.profiler = BuildProfiler()
 
     @staticmethod
     def sitesPath():
@@ -43,11 +84,31 @@ class Generator:
     def themesPath():
         return os.path.join(Generator.install_directory, "themes")
 
+    @staticmethod
+    def cachePath():
+        return os.path.join(Generator.install_directory, "cache")
+
     def generateSite(self, win, site, content_to_build = None):
         self.site = site
+        self.profiler = BuildProfiler()
         site_dir = os.path.join(Generator.install_directory, "sites", site.title)
-        if not content_to_build:
-            # clear directory
+        self.cache = BuildCache(os.path.join(Generator.cachePath(), site.title, "build.json"))
+        self.cache.load()
+        self.search_index = SearchIndex(os.path.join(Generator.cachePath(), site.title, "search.json"))
+        self.search_index.load()
+        self.assets = AssetSync(os.path.join(Generator.cachePath(), site.title, "assets.json"), self.link_mode, self.checksum)
+        if self.minify:
+            self.assets.minifier = Minifier(os.path.join(Generator.cachePath(), site.title, "minify"), self.workers)
+        reuse = content_to_build or self.incremental or self.assets.hasManifest()
+        if not reuse:
+            self.cache.clearInstalledPlugins()
+        staged = None
+        if self.staged and not content_to_build:
+            # only known outputs are reused, the live directory is left as it is until the build succeeds
+            staged = StagedOutput(site_dir)
+            site_dir = staged.prepare(reuse)
+        elif not reuse:
+            # clear directory, only needed when we do not know what a previous build has written
             for r, dirs, files in os.walk(site_dir):
                 for f in files:
                     os.remove(os.path.join(site_dir, f))
@@ -55,12 +116,232 @@ class Generator:
                 for d in dirs:
                     if d != ".git":
                         shutil.rmtree(os.path.join(site_dir, d))
+        self.profiler.lap("output")
+
+        self.createRenderer(win, site_dir)
+        menus = self.renderer.menus
+        sitevars = self.renderer.sitevars
+        themevars = self.renderer.themevars
 
+        copy_assets = False
+        if not os.path.exists(site_dir):
+            os.makedirs(site_dir)
+            self.cache.clearInstalledPlugins()
+            copy_assets = True
+
+        build_all = not content_to_build or copy_assets
+        pruner = CssPruner(site_dir, os.path.join(Generator.cachePath(), site.title))
+        pruner.load()
+        if self.prune_css:
+            # pruned stylesheets are kept by the asset sync while their sources are unchanged
+            self.assets.pruned = pruner.outputs
+        if build_all:
+            self.assets.addTree(os.path.join(Generator.install_directory, "themes", site.theme, "assets"), "assets")
+            self.assets.addTree(os.path.join(site.source_path, "assets"), "assets")
+            self.assets.addTree(os.path.join(site.source_path, "content"), "")
+            self.assets.sync(site_dir)
+
+            contents = site.pages + site.posts
+        else:
+            contents = [content_to_build]
+        self.profiler.lap("assets")
+
+        # plugin assets are installed before the pages are prepared, so they can be fingerprinted
+        used_tag_list = []
+        for content in contents:
+            content.collectTagNames(used_tag_list)
+        self.installPluginAssets(used_tag_list, site_dir)
+        self.profiler.lap("plugin assets")
+
+        # bundles are made of the plugin stylesheets as they are
+        prune_exclude = (PLUGIN_DIR,) if self.bundle else ()
+        if self.prune_css:
+            pruner.restoreExcluded(prune_exclude)
+        elif build_all and os.path.exists(pruner.filename):
+            pruner.clear()
+
+        self.bundler = AssetBundler(site_dir)
+        if self.bundle:
+            # the bundles are written before the assets are fingerprinted
+            for content in contents:
+                content_tags = []
+                content.collectTagNames(content_tags)
+                self.pluginAssets(content_tags)
+            self.profiler.lap("bundles")
+        if build_all:
+            self.bundler.removeStale(self.assets.files)
+
+        fingerprinter = Fingerprinter(site_dir, os.path.join(Generator.cachePath(), site.title, "fingerprints.json"))
+        if self.fingerprint:
+            fingerprinter.load()
+            self.renderer.fingerprints = fingerprinter.run()
+            self.profiler.lap("fingerprint")
+        elif build_all and os.path.exists(fingerprinter.cache_file):
+            fingerprinter.load()
+            fingerprinter.clear()
+
+        # elements ask for the dimensions of their images while the pages are prepared
+        image_index = ImageIndex(site_dir, os.path.join(Generator.cachePath(), site.title, "imageindex.json"))
+        image_index.load()
+        ImageIndex.current = image_index
+        derivatives = None
+        # the index and the resized images are only current while the pages are prepared, also when preparing fails
+        try:
+            if self.responsive_images and ImageDerivatives.available():
+                # elements ask for the resized images while the pages are prepared
+                derivatives = ImageDerivatives(site_dir, os.path.join(Generator.cachePath(), site.title), self.workers)
+                derivatives.load()
+                ImageDerivatives.current = derivatives
+            elif build_all and os.path.exists(os.path.join(Generator.cachePath(), site.title, "derivatives.json")):
+                ImageDerivatives(site_dir, os.path.join(Generator.cachePath(), site.title)).clear(self.assets.files)
+
+            deps_vars = {}
+            deps_vars["site"] = BuildCache.valueFingerprint({k: v for k, v in sitevars.items() if k not in LIST_VARS})
+            deps_vars["lists"] = BuildCache.valueFingerprint([sitevars[k] for k in LIST_VARS])
+            deps_vars["theme"] = BuildCache.valueFingerprint(themevars)
+            deps_vars["fingerprints"] = BuildCache.valueFingerprint(self.renderer.fingerprints)
+            jobs = []
+            for content in contents:
+                deps = self.contentDependencies(content, menus, deps_vars)
+                if self.incremental and content != content_to_build and self.cache.isUpToDate(content.url(), deps, site_dir):
+                    # a page missing in the search index is rendered once more to index it
+                    if not self.search or self.search_index.has(content.url()):
+                        continue
+                image_index.used = []
+                jobs.append(self.prepareContent(content, menus))
+                deps["images"] = image_index.fingerprints(image_index.used)
+                self.cache.setDependencies(content.url(), deps)
+            urls = [content.url() for content in contents]
+            if build_all:
+                for listing in self.post_index.listings():
+                    if listing["url"] in urls:
+                        print("Blog listing " + listing["url"] + " is not generated, a page with the same name exists")
+                        continue
+                    urls.append(listing["url"])
+                    deps = self.listingDependencies(listing, menus, deps_vars)
+                    if self.incremental and self.cache.isUpToDate(listing["url"], deps, site_dir):
+                        continue
+                    jobs.append(self.prepareListing(listing))
+                    self.cache.setDependencies(listing["url"], deps)
+            self.profiler.lap("prepare")
+        finally:
+            ImageIndex.current = None
+            ImageDerivatives.current = None
+        if build_all:
+            image_index.removeMissing()
+        if derivatives:
+            if derivatives.derive(build_all, self.assets.files) and self.fingerprint:
+                # the pages refer to the copies in their srcset, they need hashed names before the pages are rendered
+                self.updateFingerprints(fingerprinter)
+            self.profiler.lap("images")
+        failed = self.renderContents(jobs)
+        errors = len(failed)
+        # the dependencies are recorded while the pages are prepared, failed pages are rendered again by the next build
+        for url in failed:
+            self.cache.removeOutput(url)
+        self.profiler.lap("render")
+
+        if build_all:
+            # remove pages, posts and listings which have been deleted since the last build
+            for output in self.cache.outputNames():
+                if output not in urls:
+                    self.cache.removeOutput(output)
+                    if os.path.exists(os.path.join(site_dir, output)):
+                        os.remove(os.path.join(site_dir, output))
+
+        if self.prune_css:
+            if pruner.run(self.templateDirs(), prune_exclude) and self.fingerprint:
+                self.updateFingerprints(fingerprinter)
+            self.profiler.lap("prune css")
+
+        if self.search:
+            self.updateSearchIndex(jobs, contents if build_all else None, site_dir)
+            self.profiler.lap("search")
+
+        base_url = self.base_url or site.url
+        if build_all and base_url:
+            self.generateFeeds(site_dir, base_url, contents, urls)
+            self.profiler.lap("feeds")
+
+        # the marker tells a build without compression to remove the siblings of an earlier build
+        marker = os.path.join(Generator.cachePath(), site.title, "compressed")
+        if self.compress:
+            Compressor(site_dir, self.workers).compress()
+            os.makedirs(os.path.dirname(marker), exist_ok=True)
+            open(marker, "w").close()
+            self.profiler.lap("compress")
+        elif build_all and os.path.exists(marker):
+            Compressor(site_dir).clear()
+            os.remove(marker)
+
+        if staged:
+            if errors:
+                staged.abort()
+                print("Build of " + site.title + " failed, the previous output has been kept")
+                self.profiler.finish()
+                return False
+            staged.commit()
+        # the caches describe the output, they are not saved when the output has been thrown away
+        if self.fingerprint:
+            fingerprinter.save()
+        image_index.save()
+        if derivatives:
+            derivatives.save()
+        if self.prune_css:
+            pruner.save()
+        if build_all:
+            self.assets.saveManifest()
+        self.cache.save()
+        if self.search:
+            self.search_index.save()
+        self.profiler.finish()
+        return errors == 0
+
+    def updateFingerprints(self, fingerprinter):
+        # new or changed assets like pruned stylesheets or resized images get new hashed names,
+        # pages which are not rendered again refer to the old ones
+        old = self.renderer.fingerprints
+        self.renderer.fingerprints = fingerprinter.run()
+        fingerprinter.replaceReferences(old, self.cache.outputNames())
+        value = BuildCache.valueFingerprint(self.renderer.fingerprints)
+        for output in self.cache.outputNames():
+            deps = self.cache.dependencies(output)
+            if "fingerprints" in deps:
+                deps["fingerprints"] = value
+
+    def updateSearchIndex(self, jobs, contents, site_dir):
+        # only the pages rendered in this build are tokenized, listings only repeat the excerpts of the posts
+        for job in jobs:
+            if "listing" not in job and "text" in job:
+                self.search_index.addPage(job["url"], job["page"]["title"], job["text"])
+        if contents is not None:
+            self.search_index.removeOtherPages([content.url() for content in contents])
+        self.search_index.write(os.path.join(site_dir, "search"))
+
+    def generateFeeds(self, site_dir, base_url, contents, urls):
+        feeds = Feeds(site_dir, base_url, assets=self.assets.files)
+        feeds.writeSitemap(self.sitemapEntries(contents, urls))
+        feeds.writeRss(self.site.title, self.site.description, self.post_index.posts)
+        feeds.writeAtom(self.site.title, self.site.author, self.post_index.posts)
+        for name in feeds.written:
+            print("Generated " + name)
+
+    def sitemapEntries(self, contents, urls):
+        for content in contents:
+            date = content.date.toString("yyyy-MM-dd") if content.date and content.date.isValid() else ""
+            yield content.url(), date
+        # listings are dated with their newest post
+        for listing in self.post_index.listings():
+            if listing["url"] in urls:
+                yield listing["url"], listing["posts"][0]["date"] if listing["posts"] else ""
+
+    def createRenderer(self, win, site_dir):
+        # collects the variables of the site, its menus and the theme for the templates
         pages = []
         posts = []
         menus = {}
 
-        for content in site.pages:
+        for content in self.site.pages:
             cm = {}
             cm["author"] = content.author
             cm["date"] = content.date
@@ -68,7 +349,7 @@ class Generator:
             cm["menu"] = content.menu
             cm["source"] = content.source
             cm["title"] = content.title
-            cm["url"] = content.url
+            cm["url"] = content.url()
             cm["logo"] = content.logo
             cm["keywords"] = content.keywords
             cm["script"] = content.script
@@ -78,7 +359,7 @@ class Generator:
 
             pages.append(cm)
 
-        for content in site.posts:
+        for content in sortPosts(self.site.posts):
             cm = {}
             cm["author"] = content.author
             cm["date"] = content.date
@@ -87,7 +368,7 @@ class Generator:
             cm["menu"] = content.menu
             cm["source"] = content.source
             cm["title"] = content.title
-            cm["url"] = content.url
+            cm["url"] = content.url()
             cm["logo"] = content.logo
             cm["keywords"] = content.keywords
             cm["script"] = content.script
@@ -96,8 +377,9 @@ class Generator:
                 cm[att] = value
 
             posts.append(cm)
+        self.profiler.lap("context")
 
-        for menu in site.menus.menus:
+        for menu in self.site.menus.menus:
             items = []
             for item in menu.items:
                 menuitem = {}
@@ -131,62 +413,167 @@ class Generator:
                 items.append(menuitem)
 
             menus[menu.name] = items
+        self.profiler.lap("menus")
 
-        #qStableSort(posts.begin(), posts.end(), postLaterThan)
+        self.post_index = PostIndex(self.site.posts, self.posts_per_page)
 
         sitevars = {}
-        sitevars["title"] = site.title
-        sitevars["description"] = site.description
-        sitevars["theme"] = site.theme
-        sitevars["copyright"] = site.copyright
-        sitevars["source"] = site.source_path
-        sitevars["keywords"] = site.keywords
-        sitevars["author"] = site.author
-        sitevars["logo"] = site.logo
+        sitevars["title"] = self.site.title
+        sitevars["description"] = self.site.description
+        sitevars["theme"] = self.site.theme
+        sitevars["copyright"] = self.site.copyright
+        sitevars["source"] = self.site.source_path
+        sitevars["keywords"] = self.site.keywords
+        sitevars["author"] = self.site.author
+        sitevars["logo"] = self.site.logo
+        sitevars["url"] = self.site.url
         sitevars["pages"] = pages
         sitevars["posts"] = posts
+        sitevars["recent_posts"] = self.post_index.recentPosts()
+        sitevars["archives"] = self.post_index.archives()
 
-        for att, value in site.attributes.items():
+        for att, value in self.site.attributes.items():
             sitevars[att] = value
         act = Plugins.actualThemeEditorPlugin()
         if act:
             tei = Plugins.getThemePlugin(Plugins.actualThemeEditorPlugin())
             if tei:
                 tei.setWindow(win)
-                tei.setSourcePath(site.source_path)
+                tei.setSourcePath(self.site.source_path)
                 themevars = tei.themeVars()
         else:
             themevars = {}
+        self.profiler.lap("theme")
 
-        context = Context()
-        context["site"] = sitevars
-        context["theme"] = themevars
+        bytecode_dir = None
+        if self.bytecode_cache:
+            bytecode_dir = os.path.join(Generator.cachePath(), self.site.title, "jinja")
+        self.renderer = ContentRenderer(site_dir, self.templateDirs(), sitevars, themevars, menus, SiteSnapshot(self.site), self.debug, bytecode_dir, self.minify)
 
-        copy_assets = False
-        if not os.path.exists(site_dir):
-            os.mkdir(site_dir)
-            copy_assets = True
-
-        if not content_to_build or copy_assets:
-            self.copytree(os.path.join(Generator.install_directory, "themes", site.theme, "assets"), os.path.join(Generator.install_directory, "sites", site.title, "assets"))
-            self.copytree(os.path.join(site.source_path, "assets"), os.path.join(Generator.install_directory, "sites", site.title, "assets"))
-            self.copytree(os.path.join(site.source_path, "content"), os.path.join(Generator.install_directory, "sites", site.title))
-
-            for page in site.pages:
-                self.generateContent(page, context, menus)
-            for post in site.posts:
-                self.generateContent(post, context, menus)
-        else:
-            self.generateContent(content_to_build, context, menus)
-
-    def generateContent(self, content, context, menus):
-        dirs = [
+    def templateDirs(self):
+        return [
             os.path.join(self.site.source_path, "includes"),
             os.path.join(self.site.source_path, "layouts"),
             os.path.join(Generator.install_directory, "themes", self.site.theme, "layouts"),
             os.path.join(Generator.install_directory, "themes", self.site.theme, "includes")
         ]
-        eng = Engine(dirs = dirs, debug=True)
+
+    def contentDependencies(self, content, menus, deps_vars):
+        if content.content_type == ContentType.PAGE:
+            source = os.path.join(self.site.source_path, "pages", content.source)
+        else:
+            source = os.path.join(self.site.source_path, "posts", content.source)
+        layout = content.layout
+        if not layout:
+            layout = "default"
+        dirs = self.templateDirs()
+
+        deps = {}
+        deps["content"] = self.cache.fileFingerprint(source)
+        deps["templates"] = {}
+        for path in self.cache.templateDependencies(dirs, layout + ".html"):
+            deps["templates"][path] = self.cache.fileFingerprint(path)
+        deps["menu"] = BuildCache.valueFingerprint(menus.get(content.menu))
+        deps["theme"] = deps_vars["theme"]
+        deps["site"] = deps_vars["site"]
+        if self.minify:
+            deps["minify"] = True
+        if self.fingerprint:
+            deps["fingerprints"] = deps_vars["fingerprints"]
+        if ImageDerivatives.current:
+            deps["responsive_images"] = True
+        if ImageIndex.current:
+            # the images shown in the last build, their dimensions go into the markup
+            deps["images"] = ImageIndex.current.fingerprints(self.cache.dependencies(content.url()).get("images", {}))
+        # the list of all pages and posts only matters for content looping over it
+        if self.cache.templatesContain(dirs, layout + ".html", LISTS) or self.cache.fileContains(source, LISTS):
+            deps["lists"] = deps_vars["lists"]
+
+        used_tag_list = []
+        content.collectTagNames(used_tag_list)
+        deps["plugins"] = {}
+        for name in Plugins.elementPluginNames():
+            plugin = Plugins.element_plugins[name]
+            if plugin.tag_name in used_tag_list:
+                deps["plugins"][plugin.class_name] = plugin.version
+        if self.bundle:
+            # a list like it is read back from the build cache, not a tuple
+            deps["bundles"] = list(self.pluginAssets(used_tag_list))
+        return deps
+
+    def listingLayout(self):
+        for dir in self.templateDirs():
+            if os.path.isfile(os.path.join(dir, "list.html")):
+                return "list"
+        return "default"
+
+    def listingMenu(self, menus):
+        if "default" in menus or not menus:
+            return "default"
+        return sorted(menus)[0]
+
+    def listingDependencies(self, listing, menus, deps_vars):
+        dirs = self.templateDirs()
+        deps = {}
+        deps["listing"] = BuildCache.valueFingerprint(listing)
+        deps["templates"] = {}
+        templates = [self.listingLayout() + ".html", "postlist.html"]
+        for name in templates:
+            for path in self.cache.templateDependencies(dirs, name):
+                deps["templates"][path] = self.cache.fileFingerprint(path)
+        deps["menu"] = BuildCache.valueFingerprint(menus.get(self.listingMenu(menus)))
+        deps["theme"] = deps_vars["theme"]
+        deps["site"] = deps_vars["site"]
+        # the posts of the listing are part of it, the lists of the site only matter to templates showing them
+        if any(self.cache.templatesContain(dirs, name, LISTS) for name in templates):
+            deps["lists"] = deps_vars["lists"]
+        if self.minify:
+            deps["minify"] = True
+        if self.fingerprint:
+            deps["fingerprints"] = deps_vars["fingerprints"]
+        return deps
+
+    def prepareListing(self, listing):
+        cm = {}
+        cm["author"] = self.site.author
+        cm["layout"] = self.listingLayout()
+        cm["menu"] = self.listingMenu(self.renderer.menus)
+        cm["title"] = listing["title"]
+        cm["url"] = listing["url"]
+        cm["logo"] = self.site.logo
+        cm["keywords"] = self.site.keywords
+
+        job = {}
+        job["url"] = listing["url"]
+        job["layout"] = cm["layout"]
+        job["menu"] = cm["menu"]
+        job["page"] = cm
+        job["listing"] = listing
+        job["snapshot"] = None
+        job["body"] = ""
+        job["styles"] = ""
+        job["scripts"] = ""
+        return job
+
+    def renderListing(self, url):
+        # renders a listing page into a string, createRenderer has to be called before
+        for listing in self.post_index.listings():
+            if listing["url"] == url:
+                html, timings = self.renderer.renderPage(self.prepareListing(listing))
+                return html
+        return None
+
+    def renderContent(self, content):
+        # renders a page or post into a string, createRenderer has to be called before
+        html, timings = self.renderer.renderPage(self.prepareContent(content, self.renderer.menus))
+        return html
+
+    def generateContent(self, content, menus):
+        error, timings, text = self.renderer.render(self.prepareContent(content, menus))
+        if error:
+            print(*error)
+
+    def prepareContent(self, content, menus):
         cm = {}
 
         if content.content_type == ContentType.POST:
@@ -197,65 +584,98 @@ class Generator:
         cm["menu"] = content.menu
         cm["source"] = content.source
         cm["title"] = content.title
-        cm["url"] = content.url
+        cm["url"] = content.url()
         cm["logo"] = content.logo
         cm["keywords"] = content.keywords
         cm["script"] = html.unescape(content.script)
-        cm["menuitems"] = menus[content.menu]
 
         used_tag_list = []
-        self.content = ""
+        started = time.perf_counter()
+        body = io.StringIO()
         for item in content.items:
-            self.content += item.getHtml()
+            item.writeHtml(body)
             item.collectTagNames(used_tag_list)
+        if self.profiler:
+            self.profiler.addPageTime(content.url(), "body", time.perf_counter() - started)
 
-        pluginvars = {}
-        pluginvars["styles"] = ""
-        pluginvars["scripts"] = ""
-        for name in Plugins.elementPluginNames():
-            plugin = Plugins.element_plugins[name]
-            if plugin.tag_name in used_tag_list:
-                
-                plugin = Plugins.element_plugins[name]
-                pluginvars["styles"] = pluginvars["styles"] + plugin.pluginStyles()
-                pluginvars["scripts"] = pluginvars["scripts"] + plugin.pluginScripts()
-                plugin.installAssets(os.path.join(Generator.install_directory, "sites", self.site.title, "assets"))
-        
-        pluginvars["styles"] = mark_safe(pluginvars["styles"])
-        pluginvars["scripts"] = mark_safe(pluginvars["scripts"])
-        context["plugin"] = pluginvars
+        styles, scripts = self.pluginAssets(used_tag_list)
 
         layout = content.layout
         if not layout:
             layout = "default"
 
-        context["page"] = cm
-
-        ctx = {}
-        ctx["page"] = content
-        ctx["site"] = self.site
-        tmp = Template(self.content)
-        xhtml = tmp.render(ctx)
-        context["content"] = mark_safe(xhtml)
-
-        outputfile = os.path.join(Generator.install_directory, "sites", self.site.title, content.url())
-
-        try:
-            with open(outputfile, 'w') as f:
-                f.write(eng.render_to_string(layout + ".html", context=context))
-        except:
-            type, value, traceback = sys.exc_info()
-            msg = "Generate content failed: Unable to create file " + outputfile
-            print(msg, type, value, traceback)
-
-    def copytree(self, src, dst):
-        names = os.listdir(src)
-        if not os.path.exists(dst):
-            os.makedirs(dst)
-        for name in names:
-            srcname = os.path.join(src, name)
-            dstname = os.path.join(dst, name)
-            if os.path.isdir(srcname):
-                self.copytree(srcname, dstname)
+        job = {}
+        job["url"] = content.url()
+        job["layout"] = layout
+        job["menu"] = content.menu
+        job["page"] = cm
+        job["snapshot"] = ContentSnapshot(content)
+        job["body"] = body.getvalue()
+        job["styles"] = styles
+        job["scripts"] = scripts
+        return job
+
+    def pluginAssets(self, used_tag_list):
+        # the styles and scripts of the plugins used on a page, as one bundle each when bundling
+        styles = ""
+        scripts = ""
+        for name in Plugins.elementPluginNames():
+            plugin = Plugins.element_plugins[name]
+            if plugin.tag_name in used_tag_list:
+                styles = styles + plugin.pluginStyles()
+                scripts = scripts + plugin.pluginScripts()
+        if self.bundle and self.bundler:
+            return self.bundler.bundle(styles, scripts)
+        return styles, scripts
+
+    def installPluginAssets(self, used_tag_list, site_dir):
+        # every plugin used on the site installs its assets once per build,
+        # and not at all when the same version has been installed before
+        installed = False
+        for name in Plugins.elementPluginNames():
+            plugin = Plugins.element_plugins[name]
+            if plugin.tag_name not in used_tag_list:
+                continue
+            version = plugin.version + (" minified" if self.minify else "")
+            previous = self.cache.installedPluginVersion(plugin.class_name)
+            if previous == version:
+                continue
+            if previous and previous.endswith(" minified") and not self.minify:
+                # plugins do not overwrite existing files, so the minified ones are removed first
+                for filename in self.pluginAssetFiles(site_dir):
+                    os.remove(filename)
+            plugin.installAssets(os.path.join(site_dir, "assets"))
+            self.cache.setInstalledPlugin(plugin.class_name, version)
+            installed = True
+        if installed and self.minify:
+            # plugins copy their assets on their own, they are minified in place afterwards
+            self.assets.minifier.minifyFiles([(filename, filename) for filename in self.pluginAssetFiles(site_dir)])
+
+    def pluginAssetFiles(self, site_dir):
+        files = []
+        for root, dirs, names in os.walk(os.path.join(site_dir, "assets", "plugins")):
+            for name in names:
+                filename = os.path.join(root, name)
+                if Minifier.kind(name) and os.path.relpath(filename, site_dir) not in self.assets.files:
+                    files.append(filename)
+        return files
+
+    def renderContents(self, jobs):
+        if self.workers > 1 and len(jobs) >= Generator.min_parallel_jobs:
+            # spawn instead of fork, forking a running Qt application is not safe
+            mp_context = multiprocessing.get_context("spawn")
+            chunksize = max(1, len(jobs) // (self.workers * 4))
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context, initializer=initWorker, initargs=(self.renderer,)) as pool:
+                results = list(pool.map(renderInWorker, jobs, chunksize=chunksize))
+        else:
+            results = [self.renderer.render(job) for job in jobs]
+        # returns the urls of the pages which could not be rendered, the others get their rendered text
+        failed = []
+        for job, (error, timings, text) in zip(jobs, results):
+            self.profiler.addPageTimes(job["url"], timings)
+            if error:
+                print(*error)
+                failed.append(job["url"])
             else:
-                shutil.copy2(srcname, dstname)
+                job["text"] = text
+        return failed
@@ -0,0 +1,90 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import inspect
+import os
+from importlib import import_module
+from widgets.column import Column
+from widgets.content import Content
+from widgets.interfaces import ElementEditorInterface, ThemeEditorInterface
+from widgets.menu import Menu
+from widgets.menuitem import Menuitem
+from widgets.menus import Menus
+from widgets.plugins import Plugins
+from widgets.qmlparser import loadQml, registerType
+from widgets.row import Row
+from widgets.section import Section
+from widgets.site import Site
+
+
+def registerTypes():
+    registerType(Site, 'FlatSiteBuilder', 2, 0, 'Site')
+    registerType(Content, 'FlatSiteBuilder', 2, 0, 'Content')
+    registerType(Menus, 'FlatSiteBuilder', 2, 0, 'Menus')
+    registerType(Menu, 'FlatSiteBuilder', 2, 0, 'Menu')
+    registerType(Menuitem, 'FlatSiteBuilder', 2, 0, 'Menuitem')
+    registerType(Section, 'FlatSiteBuilder', 2, 0, 'Section')
+    registerType(Row, 'FlatSiteBuilder', 2, 0, 'Row')
+    registerType(Column, 'FlatSiteBuilder', 2, 0, 'Column')
+
+
+def createPlugin(klass):
+    # plugins are widgets which can not be constructed without a QApplication.
+    # The build only uses their class attributes and the methods which
+    # do not touch widgets, so the widget constructor is not called.
+    return klass.__new__(klass)
+
+
+def loadPlugins(plugins_dir):
+    for root, dirs, files in os.walk(plugins_dir):
+        for file in files:
+            modulename, ext = os.path.splitext(file)
+            if ext == ".py":
+                module = import_module("plugins." + modulename)
+                for name, klass in inspect.getmembers(module, inspect.isclass):
+                    if klass.__module__ == "plugins." + modulename:
+                        if issubclass(klass, ElementEditorInterface):
+                            instance = createPlugin(klass)
+                            Plugins.addElementPlugin(name, instance)
+                            instance.registerContenType()
+                        elif issubclass(klass, ThemeEditorInterface):
+                            Plugins.addThemePlugin(name, createPlugin(klass))
+        break # not to list __pycache__
+
+
+def loadSite(filename, contents = True):
+    # without contents the pages and posts are left to be loaded by the caller
+    site = loadQml(filename)
+    if site is None:
+        return None
+
+    site.setFilename(filename)
+    site.loadMenus()
+    if contents:
+        site.loadPages()
+        site.loadPosts()
+
+    Plugins.setActualThemeEditorPlugin("")
+    for key in Plugins.themePluginNames():
+        tei = Plugins.getThemePlugin(key)
+        if tei.theme_name == site.theme:
+            Plugins.setActualThemeEditorPlugin(tei.class_name)
+            break
+    return site
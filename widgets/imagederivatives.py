@@ -0,0 +1,231 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import hashlib
+import json
+import multiprocessing
+import os
+import posixpath
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from widgets.fingerprinter import HASHED_NAME
+from widgets.imageindex import imageDimensions
+
+try:
+    from PIL import Image as PILImage, ImageOps
+except ImportError:
+    PILImage = None
+
+WIDTHS = [480, 800, 1200, 1600]
+DERIVED_DIR = "assets/images/responsive"
+# formats which are resized, others like gif and svg are only referenced as they are
+FORMATS = {".jpg": "JPEG", ".jpeg": "JPEG", ".png": "PNG"}
+
+
+def saveImage(image, filename, format):
+    tmp = filename + ".tmp"
+    if format == "JPEG":
+        image.convert("RGB").save(tmp, "JPEG", quality=82, optimize=True, progressive=True)
+    elif format == "WEBP":
+        image.save(tmp, "WEBP", quality=80, method=4)
+    else:
+        image.save(tmp, format, optimize=True)
+    os.replace(tmp, filename)
+
+
+def deriveImage(srcname, base, cache_dir, widths, replace):
+    # writes the resized copies of one image into the cache, named by the hash of the source,
+    # and puts them into the site as base-<width>w.<ext> and base-<width>w.webp,
+    # returns the error, if any, and whether a copy has been put into the site
+    written = False
+    try:
+        sha = hashlib.sha1()
+        with open(srcname, "rb") as f:
+            for chunk in iter(lambda: f.read(65536), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        ext = os.path.splitext(srcname)[1].lower()
+        dir = os.path.join(cache_dir, digest[:2], digest)
+        os.makedirs(dir, exist_ok=True)
+        original = None
+        for width in widths:
+            for suffix, format in [(ext, FORMATS[ext]), (".webp", "WEBP")]:
+                cached = os.path.join(dir, str(width) + suffix)
+                if not os.path.exists(cached):
+                    if original is None:
+                        # the copies are turned like the exif orientation says, browsers show the original that way
+                        original = ImageOps.exif_transpose(PILImage.open(srcname))
+                    height = max(1, round(original.height * width / original.width))
+                    saveImage(original.resize((width, height), PILImage.LANCZOS), cached, format)
+                target = base + "-" + str(width) + "w" + suffix
+                if replace or not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    if os.path.lexists(target):
+                        os.remove(target)
+                    try:
+                        os.link(cached, target)
+                    except OSError:
+                        shutil.copyfile(cached, target)
+                    written = True
+    except Exception:
+        type, value, traceback = sys.exc_info()
+        return ["Image derivatives failed: Unable to resize " + srcname, str(type), str(value)], written
+    return None, written
+
+
+def deriveInWorker(args):
+    return deriveImage(*args)
+
+
+def responsiveImage(src, attributes):
+    # html of an img for the asset src with the given attributes; while a build is running it gets
+    # the dimensions of the image and the resized copies with srcset, sizes and a webp source
+    img = "<img " + attributes + " src=\"" + src + "\""
+    size = imageDimensions(src)
+    if not size:
+        return img + ">"
+    width, height = size
+    img += " width=\"" + str(width) + "\" height=\"" + str(height) + "\" loading=\"lazy\" decoding=\"async\""
+    derivatives = ImageDerivatives.current
+    widths = derivatives.addImage(src, width) if derivatives else []
+    if not widths:
+        return img + ">"
+    sizes = "(max-width: " + str(width) + "px) 100vw, " + str(width) + "px"
+    img += " srcset=\"" + derivatives.srcset(src, widths, width, os.path.splitext(src)[1]) + "\" sizes=\"" + sizes + "\">"
+    webp = "<source type=\"image/webp\" srcset=\"" + derivatives.srcset(src, widths, width, ".webp") + "\" sizes=\"" + sizes + "\">"
+    return "<picture>" + webp + img + "</picture>"
+
+
+# Resized copies of the jpeg and png images used on the pages, in several widths
+# and as webp. Elements ask for them with responsiveImage while the pages are
+# prepared, the copies are made afterwards in a process pool. The dimensions of
+# the images come from the image index. The copies are
+# cached by the hash of the image, so an image is only resized once.
+# Needs Pillow, without it the images are used as they are.
+class ImageDerivatives:
+    current = None
+    min_parallel_images = 4
+
+    def __init__(self, site_dir, cache_dir, workers = 1):
+        self.site_dir = site_dir
+        self.cache_dir = cache_dir
+        self.workers = workers
+        self.filename = os.path.join(cache_dir, "derivatives.json")
+        self.images = {}
+        self.changed = set()
+
+    @staticmethod
+    def available():
+        return PILImage is not None
+
+    def load(self):
+        try:
+            with open(self.filename, "r") as f:
+                self.images = json.load(f)
+        except (OSError, ValueError):
+            self.images = {}
+
+    def save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.images, f, sort_keys=True)
+        os.replace(tmp, self.filename)
+
+    def srcset(self, src, widths, original_width, ext):
+        base = posixpath.join(DERIVED_DIR, posixpath.splitext(posixpath.relpath(src, "assets/images"))[0])
+        candidates = [base + "-" + str(width) + "w" + ext + " " + str(width) + "w" for width in widths]
+        if ext != ".webp":
+            candidates.append(src + " " + str(original_width) + "w")
+        return ", ".join(candidates)
+
+    def addImage(self, src, width):
+        # returns the widths of the resized copies of an image
+        name = posixpath.normpath(src)
+        if posixpath.splitext(name)[1].lower() not in FORMATS:
+            return []
+        st = os.stat(os.path.join(self.site_dir, name))
+        entry = self.images.get(name)
+        if entry and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime_ns:
+            return entry["widths"]
+        entry = {"size": st.st_size, "mtime": st.st_mtime_ns, "widths": [w for w in WIDTHS if w < width]}
+        self.images[name] = entry
+        self.changed.add(name)
+        return entry["widths"]
+
+    def derive(self, build_all, assets):
+        # images of pages which have not been prepared in this build are only checked for missing copies,
+        # returns whether copies have been written or removed
+        args = []
+        for name, entry in sorted(self.images.items()):
+            srcname = os.path.join(self.site_dir, name)
+            if not os.path.exists(srcname):
+                continue
+            base = os.path.join(self.site_dir, DERIVED_DIR, os.path.splitext(os.path.relpath(name, "assets/images"))[0])
+            args.append((srcname, base, os.path.join(self.cache_dir, "images"), entry["widths"], name in self.changed))
+        if self.workers > 1 and len(args) >= ImageDerivatives.min_parallel_images:
+            mp_context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context) as pool:
+                results = list(pool.map(deriveInWorker, args))
+        else:
+            results = [deriveImage(*arg) for arg in args]
+        written = False
+        for error, copied in results:
+            if error:
+                print(*error)
+            written = written or copied
+        self.changed = set()
+        if build_all:
+            written = self.removeStale(assets) or written
+        return written
+
+    def clear(self, assets):
+        # removes the copies when responsive images have been turned off
+        self.images = {}
+        self.removeStale(assets)
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+    def removeStale(self, assets):
+        # copies of removed images and widths no longer made, files of the site itself are kept
+        for name in [name for name in self.images if not os.path.exists(os.path.join(self.site_dir, name))]:
+            del self.images[name]
+        wanted = set()
+        for name, entry in self.images.items():
+            base = posixpath.splitext(posixpath.relpath(name, "assets/images"))[0]
+            for width in entry["widths"]:
+                wanted.add(base + "-" + str(width) + "w" + posixpath.splitext(name)[1])
+                wanted.add(base + "-" + str(width) + "w.webp")
+        derived_dir = os.path.join(self.site_dir, DERIVED_DIR)
+        removed = False
+        for root, dirs, files in os.walk(derived_dir):
+            for file in files:
+                filename = os.path.join(root, file)
+                # hashed copies are removed by the fingerprinter
+                if HASHED_NAME.match(file) or os.path.relpath(filename, self.site_dir) in assets:
+                    continue
+                if posixpath.join(*os.path.relpath(filename, derived_dir).split(os.sep)) not in wanted:
+                    os.remove(filename)
+                    removed = True
+        for root, dirs, files in os.walk(derived_dir, topdown=False):
+            if not os.listdir(root):
+                os.rmdir(root)
+        return removed
@@ -0,0 +1,170 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import json
+import os
+import posixpath
+import struct
+
+JPEG_SOF = (0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF)
+
+
+def imageSize(filename):
+    # reads width and height from the header of a png, gif, jpeg or webp file without decoding it
+    try:
+        with open(filename, "rb") as f:
+            head = f.read(32)
+            if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+            if head[:6] in (b"GIF87a", b"GIF89a"):
+                return struct.unpack("<HH", head[6:10])
+            if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+                return webpSize(head)
+            if head.startswith(b"\xff\xd8"):
+                f.seek(2)
+                return jpegSize(f)
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def webpSize(head):
+    chunk = head[12:16]
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        bits = struct.unpack("<I", head[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def jpegSize(f):
+    orientation = 1
+    while True:
+        byte = f.read(1)
+        while byte and byte != b"\xff":
+            byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:
+            continue
+        if marker == 0xD9 or marker == 0xDA:
+            return None
+        length = struct.unpack(">H", f.read(2))[0]
+        if marker in JPEG_SOF:
+            height, width = struct.unpack(">xHH", f.read(5))
+            # browsers show the image rotated like the exif orientation says
+            if orientation in (5, 6, 7, 8):
+                return height, width
+            return width, height
+        segment = f.read(length - 2)
+        if marker == 0xE1 and segment.startswith(b"Exif\x00\x00"):
+            orientation = exifOrientation(segment[6:])
+
+
+def exifOrientation(tiff):
+    try:
+        order = "<" if tiff[:2] == b"II" else ">"
+        offset = struct.unpack(order + "I", tiff[4:8])[0]
+        count = struct.unpack(order + "H", tiff[offset:offset + 2])[0]
+        for i in range(count):
+            entry = offset + 2 + i * 12
+            tag, type, number, value = struct.unpack(order + "HHIH", tiff[entry:entry + 10])
+            if tag == 0x0112:
+                return value
+    except struct.error:
+        pass
+    return 1
+
+
+def imageDimensions(src):
+    # width and height of an image below assets/images while a build is running, otherwise None
+    if not ImageIndex.current:
+        return None
+    return ImageIndex.current.dimensions(src)
+
+
+# Persistent index of the dimensions of the images below assets/images in the
+# site directory. The dimensions are read from the headers of the files and are
+# kept with their size and mtime, so a file is only read again when it has
+# changed. Element plugins ask for the dimensions with imageDimensions while the
+# pages are prepared. The images asked for by a page are collected in used, so
+# the page can be rendered again when one of them changes.
+class ImageIndex:
+    current = None
+
+    def __init__(self, site_dir, filename):
+        self.site_dir = site_dir
+        self.filename = filename
+        self.images = {}
+        self.used = []
+
+    def load(self):
+        try:
+            with open(self.filename, "r") as f:
+                self.images = json.load(f)
+        except (OSError, ValueError):
+            self.images = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.images, f, sort_keys=True)
+        os.replace(tmp, self.filename)
+
+    def dimensions(self, src):
+        name = posixpath.normpath(src)
+        if not name.startswith("assets/images/"):
+            return None
+        if name not in self.used:
+            self.used.append(name)
+        try:
+            st = os.stat(os.path.join(self.site_dir, name))
+        except OSError:
+            return None
+        entry = self.images.get(name)
+        if not entry or entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+            size = imageSize(os.path.join(self.site_dir, name))
+            entry = [st.st_size, st.st_mtime_ns] + (list(size) if size else [0, 0])
+            self.images[name] = entry
+        if not entry[2]:
+            return None
+        return entry[2], entry[3]
+
+    def fingerprints(self, names):
+        fingerprints = {}
+        for name in names:
+            try:
+                st = os.stat(os.path.join(self.site_dir, name))
+                fingerprints[name] = [st.st_size, st.st_mtime_ns]
+            except OSError:
+                fingerprints[name] = []
+        return fingerprints
+
+    def removeMissing(self):
+        for name in [name for name in self.images if not os.path.exists(os.path.join(self.site_dir, name))]:
+            del self.images[name]
@@ -24,16 +24,18 @@ from PyQt5.QtWidgets import QWidget
 from PyQt5.QtCore import pyqtSignal
 
 
+# class_name, display_name, tag_name, theme_name and version are declared as
+# class attributes, so the headless build can read them without creating widgets
 class ElementEditorInterface(AnimateableEditor):
     close = pyqtSignal()
+    class_name = ""
+    display_name = ""
+    tag_name = ""
+    version = ""
 
     def __init__(self):
         AnimateableEditor.__init__(self)
-        self.class_name = ""
-        self.display_name = ""
-        self.tag_name = ""
         self.icon = None
-        self.version = ""
         self.content = None
     
     def registerContenType(self):
@@ -59,12 +61,13 @@ class ElementEditorInterface(AnimateableEditor):
 
 
 class ThemeEditorInterface(UndoableEditor):
+    class_name = ""
+    display_name = ""
+    theme_name = ""
+    version = ""
+
     def __init__(self):
         UndoableEditor.__init__(self)
-        self.class_name = ""
-        self.display_name = ""
-        self.theme_name = ""
-        self.version = ""
         self.theme_vars = {}
         self._source_path = ""
 
@@ -73,11 +76,12 @@ class ThemeEditorInterface(UndoableEditor):
 
 
 class PublisherInterface(QWidget):
+    class_name = ""
+    display_name = ""
+    version = ""
+
     def __init__(self):
         QWidget.__init__(self)
-        self.class_name = ""
-        self.display_name = ""
-        self.version = ""
         self._site_path = ""
 
     def setSitePath(self, path):
@@ -19,6 +19,7 @@
 #############################################################################
 
 from PyQt5.QtCore import pyqtProperty, QObject
+import io
 
 class Item(QObject):
 
@@ -44,6 +45,18 @@ class Item(QObject):
     def adminlabel(self, adminlabel):
         self._adminlabel = adminlabel
 
+    def getHtml(self):
+        # shim for callers which need the html as one string
+        f = io.StringIO()
+        self.writeHtml(f)
+        return f.getvalue()
+
+    def writeHtml(self, f):
+        # items write their html into f, plugins only implementing getHtml are written as a whole
+        if type(self).getHtml is Item.getHtml:
+            return
+        f.write(self.getHtml())
+
     def writeAttribute(self, f, indent, att, value):
         if value: 
             if isinstance(value, str):
@@ -20,7 +20,6 @@
 
 import os
 import inspect
-import pathlib
 import sys
 import shutil
 from importlib import import_module
@@ -34,15 +33,17 @@ from widgets.menulist import MenuList
 from widgets.menueditor import MenuEditor
 from widgets.content import ContentType
 from widgets.plugins import Plugins
+from widgets.qmlparser import loadQml
 from widgets.sitewizard import SiteWizard
 from widgets.contenteditor import ContentEditor
 from widgets.themechooser import ThemeChooser
 from widgets.interfaces import ElementEditorInterface, ThemeEditorInterface, PublisherInterface
 from widgets.sitesettingseditor import SiteSettingsEditor
+from widgets.sitewatcher import SiteWatcher
+from widgets.previewschemehandler import PreviewSchemeHandler, SCHEME
 from PyQt5.QtWidgets import QMessageBox, QVBoxLayout, QMainWindow, QWidget, QScrollArea, QDockWidget, QUndoStack, QApplication
-from PyQt5.QtCore import pyqtSignal, Qt, QUrl, QRect, QCoreApplication, QDir, QSettings, QByteArray, QEvent, QPoint, QAbstractAnimation, QPropertyAnimation
-from PyQt5.QtQml import QQmlEngine, QQmlComponent
-from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtCore import pyqtSignal, Qt, QRect, QCoreApplication, QDir, QSettings, QByteArray, QEvent, QPoint, QAbstractAnimation, QPropertyAnimation
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineProfile
 import resources
 
 class MainWindow(QMainWindow):
@@ -51,6 +52,9 @@ class MainWindow(QMainWindow):
     def __init__(self):
         QMainWindow.__init__(self)
         self.site = None
+        self.watcher = None
+        self.preview_handler = PreviewSchemeHandler(self)
+        QWebEngineProfile.defaultProfile().installUrlSchemeHandler(SCHEME, self.preview_handler)
         self.editor = ""
         self.install_directory = os.getcwd()
         self.content_after_animation = ""
@@ -225,16 +229,11 @@ class MainWindow(QMainWindow):
         self.default_path = settings.value("lastSite")
 
     def reloadProject(self, filename):
-        engine = QQmlEngine()
-        component = QQmlComponent(engine)
-        component.loadUrl(QUrl(filename))
-        self.site = component.create()
+        self.site = loadQml(filename)
         if self.site is not None:
             self.site.setFilename(filename)
             self.site.setWindow(self)
         else:
-            for error in component.errors():
-                print(error.toString())
             return False
 
         self.site.loadMenus()
@@ -256,6 +255,15 @@ class MainWindow(QMainWindow):
         #        self.site.publisher = Plugins.publishPluginNames[0]
 
         Plugins.setActualPublishPlugin(self.site.publisher)
+
+        # sources edited outside of FlatSiteBuilder are rebuilt automatically
+        if self.watcher:
+            self.watcher.stop()
+        self.watcher = SiteWatcher(self.site, self)
+        self.watcher.built.connect(self.statusBar().showMessage)
+        self.preview_handler.setSite(self.site)
+        self.watcher.changed.connect(self.preview_handler.invalidate)
+
         self.siteLoaded.emit(self.site)
         return True
 
@@ -358,8 +366,6 @@ class MainWindow(QMainWindow):
             self.editor.closeEditor()
             return
 
-        dir = os.path.join(self.install_directory, "sites")
-        path = os.path.join(dir, self.site.title)
         if not content:
             if len(self.site.pages) > 0:
                 content = self.site.pages[0]
@@ -369,13 +375,14 @@ class MainWindow(QMainWindow):
                         break
             elif len(self.site.posts) > 0:
                 content = self.site.posts()[0]
+        else:
+            # the content of an editor may not have been reloaded by the site yet
+            self.preview_handler.contentChanged(content)
 
         if content:
-            file = content.url()
             self.webView = QWebEngineView()
             self.webView.loadFinished.connect(self.webViewLoadFinished)
-            url = pathlib.Path(os.path.join(path, file)).as_uri()
-            self.webView.setUrl(QUrl(url))
+            self.webView.setUrl(self.preview_handler.url(content))
             self.setCursor(Qt.WaitCursor)
         else:
             self.statusBar().showMessage("Site has no pages or posts to preview.")
@@ -388,6 +395,13 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "FlatSiteBuilder", "Unable to open webpage.")
         self.setCursor(Qt.ArrowCursor)
 
+    def contentEdited(self, content):
+        # the edited page is written right away instead of waiting for the site watcher,
+        # the preview renders it from memory
+        gen = Generator()
+        gen.generateSite(self, self.site, content)
+        self.preview_handler.contentChanged(content)
+
     def publishSite(self):
         pluginName = Plugins.actualPublishPlugin()
         pi = Plugins.getPublishPlugin(pluginName)
@@ -407,8 +421,14 @@ class MainWindow(QMainWindow):
             self.statusBar().showMessage("Site has no pages or posts to build.")
         else:
             gen = Generator()
-            gen.generateSite(self, self.site)
-            self.statusBar().showMessage(self.site.title + " has been generated")
+            gen.incremental = True
+            gen.staged = True
+            success = gen.generateSite(self, self.site)
+            gen.profiler.save(os.path.join(Generator.cachePath(), self.site.title, "profile.json"))
+            if success:
+                self.statusBar().showMessage(self.site.title + " has been generated in %.2fs" % gen.profiler.total)
+            else:
+                self.statusBar().showMessage("Build of " + self.site.title + " failed, the previous output has been kept")
 
     def editMenu(self, item):
         menu = item.data(Qt.UserRole)
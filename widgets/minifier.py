@@ -0,0 +1,265 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import hashlib
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# part of the cache key, so changes of the minifier invalidate cached results
+VERSION = 1
+
+RAW_TAGS = re.compile(r"(?is)(<(pre|textarea|script|style)\b[^>]*>.*?</\2\s*>)")
+COMMENT = re.compile(r"(?s)<!--(?!\[if|<!|>).*?-->")
+WHITESPACE = re.compile(r"\s+")
+
+# a slash after these characters starts a regular expression in javascript, otherwise it is a division
+REGEX_PREFIX = "(,=:[!&|?{};+-*%<>~^\n"
+REGEX_KEYWORDS = ("return", "typeof", "case", "do", "else", "in", "instanceof", "new", "delete", "void", "throw")
+
+
+def collapse(match):
+    return "\n" if "\n" in match.group(0) else " "
+
+
+def minifyHtml(text):
+    # whitespace in pre, textarea, script and style is kept, styles are minified on their own
+    parts = RAW_TAGS.split(text)
+    out = []
+    i = 0
+    while i < len(parts):
+        out.append(WHITESPACE.sub(collapse, COMMENT.sub("", parts[i])))
+        if i + 1 < len(parts):
+            block = parts[i + 1]
+            if parts[i + 2].lower() == "style":
+                start = block.index(">") + 1
+                end = block.lower().rindex("</style")
+                block = block[:start] + minifyCss(block[start:end]) + block[end:]
+            out.append(block)
+        i += 3
+    return "".join(out).strip() + "\n"
+
+
+def minifyCss(text):
+    out = []
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if c in "\"'":
+            end = skipString(text, i)
+            out.append(text[i:end])
+            i = end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            # license comments are kept
+            if text.startswith("/*!", i):
+                out.append(text[i:end] + "\n")
+            i = end
+        elif c.isspace():
+            while i < n and text[i].isspace():
+                i += 1
+            # spaces before colons are kept, "a :hover" and "a:hover" are different selectors
+            if out and i < n and out[-1][-1] not in "{};,>:(\n" and text[i] not in "{};,>)":
+                out.append(" ")
+        else:
+            if c == "}" and out and out[-1] == ";":
+                out.pop()
+            out.append(c)
+            i += 1
+    return "".join(out).strip()
+
+
+def minifyJs(text):
+    # a conservative minifier: comments and indentation are removed and whitespace
+    # is collapsed, but line breaks are kept so automatic semicolon insertion still works
+    out = []
+    i = 0
+    n = len(text)
+    last = "\n"
+    while i < n:
+        c = text[i]
+        if c in "\"'`":
+            end = skipString(text, i)
+            out.append(text[i:end])
+            i = end
+            last = c
+        elif text.startswith("//", i):
+            while i < n and text[i] != "\n":
+                i += 1
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            if text.startswith("/*!", i):
+                out.append(text[i:end])
+                last = "/"
+            elif "\n" in text[i:end]:
+                i = end
+                appendSpace(out, "\n")
+                last = "\n"
+                continue
+            i = end
+            appendSpace(out, " ")
+        elif c == "/" and startsRegex(out, last):
+            end = skipRegex(text, i)
+            out.append(text[i:end])
+            i = end
+            last = "/"
+        elif c.isspace():
+            start = i
+            while i < n and text[i].isspace():
+                i += 1
+            if "\n" in text[start:i]:
+                appendSpace(out, "\n")
+                last = "\n"
+            else:
+                appendSpace(out, " ")
+        else:
+            out.append(c)
+            last = c
+            i += 1
+    while out and out[-1] in (" ", "\n"):
+        out.pop()
+    return "".join(out) + "\n"
+
+
+def appendSpace(out, space):
+    # a line break replaces a space before it, nothing is added at the start or after another line break
+    if out and out[-1] == " ":
+        out.pop()
+    if out and out[-1] != "\n":
+        out.append(space)
+
+
+def skipString(text, i):
+    quote = text[i]
+    i += 1
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == quote:
+            return i + 1
+        if text[i] == "\n" and quote != "`":
+            return i
+        i += 1
+    return i
+
+
+def startsRegex(out, last):
+    if last in REGEX_PREFIX:
+        return True
+    tail = "".join(out[-12:]).rstrip()
+    word = re.search(r"[A-Za-z_$][\w$]*$", tail)
+    return word is not None and word.group(0) in REGEX_KEYWORDS
+
+
+def skipRegex(text, i):
+    i += 1
+    in_class = False
+    while i < len(text) and text[i] != "\n":
+        c = text[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            in_class = True
+        elif c == "]":
+            in_class = False
+        elif c == "/" and not in_class:
+            i += 1
+            while i < len(text) and (text[i].isalnum() or text[i] == "_"):
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+def minifyFile(srcname, dstname, cache_dir):
+    # the minified content is cached by the hash of the source, so a file is never minified twice
+    kind = Minifier.kind(srcname)
+    with open(srcname, "rb") as f:
+        data = f.read()
+    key = hashlib.sha1((kind + str(VERSION)).encode("utf-8") + data).hexdigest()
+    cached = os.path.join(cache_dir, key[:2], key + "." + kind)
+    try:
+        if not os.path.exists(cached):
+            text = data.decode("utf-8")
+            result = minifyCss(text) if kind == "css" else minifyJs(text)
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            # workers may minify the same content at the same time
+            tmp = cached + "." + str(os.getpid()) + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(result)
+            os.replace(tmp, cached)
+        tmp = dstname + ".min"
+        shutil.copyfile(cached, tmp)
+        # the output keeps the mtime of the source, which tells the asset sync it is up to date
+        shutil.copystat(srcname, tmp)
+        os.replace(tmp, dstname)
+    except (OSError, UnicodeDecodeError):
+        type, value, traceback = sys.exc_info()
+        return ["Minify failed: Unable to minify " + srcname, str(type), str(value)]
+    return None
+
+
+def minifyInWorker(args):
+    return minifyFile(*args)
+
+
+# Minifies css and js assets into the site directory. Files already named
+# .min.css or .min.js are left as they are.
+class Minifier:
+    min_parallel_files = 16
+
+    def __init__(self, cache_dir, workers = 1):
+        self.cache_dir = cache_dir
+        self.workers = workers
+
+    @staticmethod
+    def kind(name):
+        name = name.lower()
+        if name.endswith(".min.css") or name.endswith(".min.js"):
+            return None
+        if name.endswith(".css"):
+            return "css"
+        if name.endswith(".js"):
+            return "js"
+        return None
+
+    def minifyFiles(self, files):
+        # files are (source, destination) pairs, the destination may be the source itself
+        args = [(srcname, dstname, self.cache_dir) for srcname, dstname in files]
+        if self.workers > 1 and len(args) >= Minifier.min_parallel_files:
+            mp_context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(max_workers=self.workers, mp_context=mp_context) as pool:
+                results = list(pool.map(minifyInWorker, args, chunksize=max(1, len(args) // (self.workers * 4))))
+        else:
+            results = [minifyFile(*arg) for arg in args]
+        failed = []
+        for (srcname, dstname), error in zip(files, results):
+            if error:
+                print(*error)
+                failed.append(dstname)
+        return failed
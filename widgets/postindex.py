@@ -0,0 +1,120 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import calendar
+
+POSTS_PER_PAGE = 10
+
+
+def sortPosts(posts):
+    # newest first, posts without a valid date at the end
+    return sorted(posts, key=lambda post: (post.date.isValid(), post.date.toJulianDay()), reverse=True)
+
+
+# Index of the posts sorted by date. It creates the paginated blog listing
+# and the archive pages for every year and month. Listing pages only get the
+# posts shown on them, as small dicts with the fields needed for a listing.
+# The pages are written into the root of the site, so the relative asset
+# paths of the layouts keep working.
+class PostIndex:
+
+    def __init__(self, posts, per_page = POSTS_PER_PAGE):
+        self.per_page = max(1, per_page)
+        self.posts = []
+        for post in sortPosts(posts):
+            entry = {}
+            entry["title"] = post.title
+            entry["url"] = post.url()
+            entry["date"] = post.date.toString("yyyy-MM-dd") if post.date.isValid() else ""
+            entry["year"] = post.date.year() if post.date.isValid() else 0
+            entry["month"] = post.date.month() if post.date.isValid() else 0
+            entry["excerpt"] = post.excerpt
+            entry["author"] = post.author
+            entry["logo"] = post.logo
+            self.posts.append(entry)
+
+    def recentPosts(self):
+        return self.posts[:self.per_page]
+
+    def years(self):
+        years = []
+        for post in self.posts:
+            if post["year"] and post["year"] not in years:
+                years.append(post["year"])
+        return years
+
+    def months(self, year):
+        months = []
+        for post in self.posts:
+            if post["year"] == year and post["month"] not in months:
+                months.append(post["month"])
+        return months
+
+    def archives(self):
+        archives = []
+        for year in self.years():
+            posts = [post for post in self.posts if post["year"] == year]
+            archive = {}
+            archive["year"] = year
+            archive["title"] = str(year)
+            archive["url"] = self.pageUrl("archive-" + str(year), 1)
+            archive["count"] = len(posts)
+            archive["months"] = []
+            for month in self.months(year):
+                entry = {}
+                entry["month"] = month
+                entry["title"] = calendar.month_name[month] + " " + str(year)
+                entry["url"] = self.pageUrl("archive-%d-%02d" % (year, month), 1)
+                entry["count"] = len([post for post in posts if post["month"] == month])
+                archive["months"].append(entry)
+            archives.append(archive)
+        return archives
+
+    def listings(self):
+        listings = self.paginate(self.posts, "blog", "Blog", 0, 0)
+        for year in self.years():
+            posts = [post for post in self.posts if post["year"] == year]
+            listings += self.paginate(posts, "archive-" + str(year), str(year), year, 0)
+            for month in self.months(year):
+                month_posts = [post for post in posts if post["month"] == month]
+                listings += self.paginate(month_posts, "archive-%d-%02d" % (year, month), calendar.month_name[month] + " " + str(year), year, month)
+        return listings
+
+    def pageUrl(self, name, number):
+        if number == 1:
+            return name + ".html"
+        return name + "-page" + str(number) + ".html"
+
+    def paginate(self, posts, name, title, year, month):
+        listings = []
+        count = (len(posts) + self.per_page - 1) // self.per_page
+        for number in range(1, count + 1):
+            listing = {}
+            listing["url"] = self.pageUrl(name, number)
+            listing["title"] = title
+            listing["year"] = year
+            listing["month"] = month
+            listing["posts"] = posts[(number - 1) * self.per_page:number * self.per_page]
+            listing["number"] = number
+            listing["count"] = count
+            listing["previous"] = self.pageUrl(name, number - 1) if number > 1 else ""
+            listing["next"] = self.pageUrl(name, number + 1) if number < count else ""
+            listings.append(listing)
+        return listings
@@ -0,0 +1,102 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import os
+import shutil
+from widgets.content import ContentType
+from widgets.generator import Generator
+from widgets.plugins import Plugins
+
+
+# Renders the pages and posts of a site on request and keeps them in memory
+# until the site changes. Used by the preview server and the preview in the
+# desktop app, nothing is written to the site directory.
+class PreviewCache:
+
+    def __init__(self, site, debug = True, reload_script = ""):
+        self.site = site
+        self.debug = debug
+        self.reload_script = reload_script
+        self.pages = {}
+        self.generator = None
+        self.plugin_dir = os.path.join(Generator.cachePath(), site.title, "preview")
+        self.installPluginAssets()
+
+    def installPluginAssets(self):
+        # plugins install their assets from qt resources, so they are installed once for the preview
+        shutil.rmtree(self.plugin_dir, ignore_errors=True)
+        os.makedirs(os.path.join(self.plugin_dir, "assets"))
+        for name in Plugins.elementPluginNames():
+            Plugins.element_plugins[name].installAssets(os.path.join(self.plugin_dir, "assets"))
+
+    def invalidate(self):
+        self.pages = {}
+        self.generator = None
+
+    def updateContent(self, content):
+        # a page or post which has been edited but not reloaded by the site yet
+        if content.content_type == ContentType.PAGE:
+            contents = self.site.pages
+        else:
+            contents = self.site.posts
+        for i, c in enumerate(contents):
+            if c.source == content.source:
+                contents[i] = content
+                break
+        self.invalidate()
+
+    def renderPage(self, url):
+        # returns the html of the page or post with this url, or None if there is none
+        if url in self.pages:
+            return self.pages[url]
+        if not self.generator:
+            self.generator = Generator()
+            self.generator.debug = self.debug
+            self.generator.site = self.site
+            self.generator.createRenderer(None, self.plugin_dir)
+        for content in self.site.pages + self.site.posts:
+            if content.url() == url:
+                html = self.generator.renderContent(content)
+                break
+        else:
+            html = self.generator.renderListing(url)
+            if html is None:
+                return None
+        if self.reload_script:
+            index = html.lower().rfind("</body>")
+            if index < 0:
+                index = len(html)
+            html = html[:index] + self.reload_script + html[index:]
+        page = html.encode("utf-8")
+        self.pages[url] = page
+        return page
+
+    def findFile(self, path):
+        # the same order as the build, content files override site assets which override theme assets
+        dirs = [os.path.join(self.site.source_path, "content")]
+        if path.startswith("assets/"):
+            dirs.append(self.site.source_path)
+            dirs.append(os.path.join(Generator.themesPath(), self.site.theme))
+            dirs.append(self.plugin_dir)
+        for dir in dirs:
+            filename = os.path.normpath(os.path.join(dir, path))
+            if filename.startswith(os.path.normpath(dir) + os.sep) and os.path.isfile(filename):
+                return filename
+        return ""
@@ -0,0 +1,90 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import mimetypes
+import sys
+from widgets.previewcache import PreviewCache
+from PyQt5.QtCore import QBuffer, QIODevice, QUrl
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestJob, QWebEngineUrlScheme, QWebEngineUrlSchemeHandler
+
+SCHEME = b"preview"
+
+
+def registerPreviewScheme():
+    # has to be called before the QApplication is created
+    scheme = QWebEngineUrlScheme(SCHEME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    scheme.setFlags(QWebEngineUrlScheme.SecureScheme | QWebEngineUrlScheme.LocalAccessAllowed)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+# Serves the preview of the loaded site to the QWebEngineView from memory.
+# Pages are rendered by a PreviewCache and assets are read from the site and
+# theme directories, so the preview neither needs nor reads a build on disk.
+class PreviewSchemeHandler(QWebEngineUrlSchemeHandler):
+
+    def __init__(self, parent = None):
+        super().__init__(parent)
+        self.cache = None
+
+    def setSite(self, site):
+        self.cache = PreviewCache(site) if site else None
+
+    def invalidate(self):
+        if self.cache:
+            self.cache.invalidate()
+
+    def contentChanged(self, content):
+        if self.cache:
+            self.cache.updateContent(content)
+
+    def url(self, content):
+        return QUrl(SCHEME.decode() + "://site/" + content.url())
+
+    def requestStarted(self, job):
+        if not self.cache:
+            job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+            return
+        url = job.requestUrl().path().lstrip("/")
+        if not url or url.endswith("/"):
+            url += "index.html"
+
+        try:
+            data = self.cache.renderPage(url)
+        except:
+            type, value, traceback = sys.exc_info()
+            print("Preview failed: Unable to render " + url, type, value)
+            job.fail(QWebEngineUrlRequestJob.RequestFailed)
+            return
+        mimetype = "text/html"
+        if data is None:
+            filename = self.cache.findFile(url)
+            if not filename:
+                job.fail(QWebEngineUrlRequestJob.UrlNotFound)
+                return
+            with open(filename, "rb") as f:
+                data = f.read()
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        # the buffer is deleted together with the job
+        buffer = QBuffer(job)
+        buffer.setData(data)
+        buffer.open(QIODevice.ReadOnly)
+        job.reply(mimetype.encode(), buffer)
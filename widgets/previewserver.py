@@ -0,0 +1,156 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import mimetypes
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+from widgets.previewcache import PreviewCache
+from widgets.sitewatcher import SiteWatcher
+from PyQt5.QtCore import QObject, pyqtSignal
+
+RELOAD_PATH = "/__livereload"
+RELOAD_SCRIPT = "<script>new EventSource(\"" + RELOAD_PATH + "\").onmessage = function() { location.reload(); };</script>\n"
+
+
+# Serves a site for previewing without building it, the pages are rendered by
+# a PreviewCache. Every served page listens for a reload event which is sent
+# when the sources have changed.
+# Requests are handled in threads, but the pages are QObjects living in the
+# main thread, so they are rendered there.
+class PreviewServer(QObject):
+    renderRequested = pyqtSignal(object)
+
+    def __init__(self, site, host = "127.0.0.1", port = 8000, debug = True):
+        super().__init__()
+        self.site = site
+        self.cache = PreviewCache(site, debug, RELOAD_SCRIPT)
+        self.generation = 0
+        self.condition = threading.Condition()
+        self.watcher = SiteWatcher(site, build=False)
+        self.watcher.changed.connect(self.invalidate)
+        self.renderRequested.connect(self.renderRequest)
+        self.httpd = ThreadingHTTPServer((host, port), PreviewRequestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.preview = self
+        self.thread = None
+
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return "http://" + host + ":" + str(port) + "/"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.watcher.stop()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def invalidate(self):
+        self.cache.invalidate()
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def waitForChange(self, generation, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+    def requestPage(self, url):
+        # called by the request threads, waits until the main thread has rendered the page
+        request = {"url": url, "page": None, "error": None, "done": threading.Event()}
+        self.renderRequested.emit(request)
+        request["done"].wait()
+        if request["error"]:
+            raise request["error"]
+        return request["page"]
+
+    def renderRequest(self, request):
+        try:
+            request["page"] = self.cache.renderPage(request["url"])
+        except Exception as e:
+            request["error"] = e
+        request["done"].set()
+
+
+class PreviewRequestHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        preview = self.server.preview
+        path = unquote(urlsplit(self.path).path)
+        if path == RELOAD_PATH:
+            self.sendReloadEvents(preview)
+            return
+        url = path.lstrip("/")
+        if not url or url.endswith("/"):
+            url += "index.html"
+
+        try:
+            page = preview.requestPage(url)
+        except:
+            type, value, traceback = sys.exc_info()
+            print("Preview failed: Unable to render " + url, type, value)
+            self.sendData(500, "text/plain; charset=utf-8", ("Unable to render " + url + "\n" + str(value)).encode("utf-8"))
+            return
+        if page is not None:
+            self.sendData(200, "text/html; charset=utf-8", page)
+            return
+
+        filename = preview.cache.findFile(url)
+        if not filename:
+            self.sendData(404, "text/plain; charset=utf-8", (url + " not found").encode("utf-8"))
+            return
+        with open(filename, "rb") as f:
+            data = f.read()
+        self.sendData(200, mimetypes.guess_type(filename)[0] or "application/octet-stream", data)
+
+    def sendData(self, status, type, data):
+        self.send_response(status)
+        self.send_header("Content-Type", type)
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def sendReloadEvents(self, preview):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        generation = preview.generation
+        try:
+            while True:
+                current = preview.waitForChange(generation, 15)
+                if current != generation:
+                    self.wfile.write(b"data: reload\n\n")
+                    generation = current
+                else:
+                    # keeps the connection open and notices closed connections
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
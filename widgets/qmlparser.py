@@ -0,0 +1,231 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import os
+import re
+from PyQt5.QtCore import Qt, QDate, QUrl
+from PyQt5.QtQml import qmlRegisterType, QQmlEngine, QQmlComponent
+
+
+TOKENS = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<punct>[{}:;])
+""", re.S | re.X)
+
+ESCAPES = re.compile(r"\\(u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\r\n|.)", re.S)
+ESCAPE_CHARS = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "0": "\0", "\n": "", "\r\n": ""}
+QML_ID = re.compile(r"[a-z_][A-Za-z0-9_]*$")
+
+
+class QmlParserError(Exception):
+    pass
+
+
+def registerType(klass, uri, major, minor, name):
+    # registers the type for the QQmlEngine and for the QmlParser
+    qmlRegisterType(klass, uri, major, minor, name)
+    QmlParser.types[(uri, major, name)] = klass
+
+
+def loadQml(filename):
+    # files written by FlatSiteBuilder are read by the QmlParser,
+    # everything else is left to the QQmlEngine
+    try:
+        return QmlParser().parseFile(filename)
+    except QmlParserError:
+        pass
+
+    engine = QQmlEngine()
+    component = QQmlComponent(engine)
+    component.loadUrl(QUrl.fromLocalFile(os.path.abspath(filename)))
+    obj = component.create()
+    if obj is None:
+        for error in component.errors():
+            print(error.toString())
+    del engine
+    return obj
+
+
+def unescape(match):
+    esc = match.group(1)
+    if esc[0] in "ux" and len(esc) > 1:
+        return chr(int(esc[1:], 16))
+    return ESCAPE_CHARS.get(esc, esc)
+
+
+# Parser for the subset of QML written by the save methods of Site, Content,
+# Section, Row, Column and the element plugins: imports, nested objects and
+# properties with literal values. Anything else raises a QmlParserError.
+class QmlParser:
+    types = {}
+
+    def __init__(self):
+        self.tokens = []
+        self.pos = 0
+        self.imports = []
+
+    def parseFile(self, filename):
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                source = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            raise QmlParserError(str(e))
+        return self.parse(source)
+
+    def parse(self, source):
+        self.tokenize(source)
+        self.imports = []
+        while self.peek() == ("name", "import"):
+            self.next()
+            kind, uri = self.next()
+            if kind != "name":
+                raise QmlParserError("unsupported import")
+            kind, version = self.next()
+            if kind != "number":
+                raise QmlParserError("import without version")
+            self.imports.append((uri, int(version.split(".")[0])))
+        obj = self.parseObject()
+        if self.peek()[0] != "end":
+            raise QmlParserError("unexpected content after root object")
+        return obj
+
+    def tokenize(self, source):
+        self.tokens = []
+        self.pos = 0
+        pos = 0
+        length = len(source)
+        while pos < length:
+            match = TOKENS.match(source, pos)
+            if not match:
+                raise QmlParserError("unsupported syntax at offset " + str(pos))
+            kind = match.lastgroup
+            if kind == "string":
+                self.tokens.append((kind, ESCAPES.sub(unescape, match.group()[1:-1])))
+            elif kind != "space" and kind != "comment":
+                self.tokens.append((kind, match.group()))
+            pos = match.end()
+        self.tokens.append(("end", ""))
+
+    def peek(self, offset = 0):
+        return self.tokens[min(self.pos + offset, len(self.tokens) - 1)]
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def expect(self, value):
+        kind, text = self.next()
+        if text != value or kind == "string":
+            raise QmlParserError("expected " + value)
+
+    def createObject(self, type_name):
+        for uri, major in self.imports:
+            klass = QmlParser.types.get((uri, major, type_name))
+            if klass:
+                return klass()
+        raise QmlParserError("unknown type " + type_name)
+
+    def parseObject(self):
+        kind, type_name = self.next()
+        if kind != "name":
+            raise QmlParserError("expected type name")
+        obj = self.createObject(type_name)
+        self.expect("{")
+        while True:
+            kind, text = self.peek()
+            if kind == "punct" and text == "}":
+                self.next()
+                return obj
+            if kind == "punct" and text == ";":
+                self.next()
+                continue
+            if kind != "name":
+                raise QmlParserError("unexpected token " + text)
+            following = self.peek(1)
+            if following == ("punct", "{"):
+                self.appendChild(obj, self.parseObject())
+            elif following == ("punct", ":"):
+                self.next()
+                self.next()
+                self.parseProperty(obj, text)
+            else:
+                raise QmlParserError("unsupported statement " + text)
+
+    def parseProperty(self, obj, name):
+        kind, value = self.next()
+        if name == "id":
+            # like the QQmlEngine the object id is only assigned to types declaring an id property
+            if kind != "name" or not QML_ID.match(value):
+                raise QmlParserError("invalid id " + value)
+            if obj.metaObject().indexOfProperty("id") >= 0:
+                setattr(obj, name, self.convert(obj, name, value))
+            return
+        following = self.peek()
+        if following[0] != "name" and following != ("punct", "}") and following != ("punct", ";"):
+            raise QmlParserError("unsupported binding for " + name)
+        if kind == "name":
+            if value == "true":
+                value = True
+            elif value == "false":
+                value = False
+            else:
+                raise QmlParserError("unsupported binding for " + name)
+        elif kind == "number":
+            value = float(value) if "." in value else int(value)
+        elif kind != "string":
+            raise QmlParserError("unsupported value for " + name)
+        setattr(obj, name, self.convert(obj, name, value))
+
+    def convert(self, obj, name, value):
+        mo = obj.metaObject()
+        index = mo.indexOfProperty(name)
+        if index < 0 or not mo.property(index).isWritable():
+            raise QmlParserError("unknown property " + name)
+        type_name = mo.property(index).typeName()
+        if type_name == "QString":
+            if isinstance(value, bool):
+                return "true" if value else "false"
+            return str(value)
+        elif type_name == "bool" and isinstance(value, bool):
+            return value
+        elif type_name == "int" and isinstance(value, int) and not isinstance(value, bool):
+            return value
+        elif type_name == "double" and isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        elif type_name == "QDate" and isinstance(value, str):
+            date = QDate.fromString(value, Qt.ISODate)
+            if date.isValid():
+                return date
+        raise QmlParserError("unsupported value for " + name)
+
+    def appendChild(self, obj, child):
+        mo = obj.metaObject()
+        index = mo.indexOfClassInfo("DefaultProperty")
+        if index < 0:
+            raise QmlParserError(type(obj).__name__ + " has no default property")
+        items = getattr(obj, "_" + mo.classInfo(index).value(), None)
+        if not isinstance(items, list):
+            raise QmlParserError(type(obj).__name__ + " default property is no list")
+        items.append(child)
@@ -59,14 +59,14 @@ class Row(Item):
             item.save(f, indent + 4)
         f.write(" " * indent + "}\n")
 
-    def getHtml(self):
-        html = "<div class=\"row"
+    def writeHtml(self, f):
+        f.write("<div class=\"row")
         if self._cssclass:
-            html += " " + self._cssclass
-        html += "\">\n"
+            f.write(" " + self._cssclass)
+        f.write("\">\n")
         for item in self._columns:
-            html += item.getHtml()
-        return html + "</div>\n"
+            item.writeHtml(f)
+        f.write("</div>\n")
 
     def collectTagNames(self, list):
         for item in self._columns:
@@ -0,0 +1,207 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import html
+import json
+import os
+import re
+import sys
+
+PREFIX_LENGTH = 2
+MAX_TERM_LENGTH = 32
+
+SEARCH_SCRIPT = """// Searches the index written by FlatSiteBuilder, only the shards of the query words are loaded.
+// siteSearch("some words", function(results) { ... }) calls back with [{url, title, score}], best first.
+var siteSearch = (function() {
+    var base = document.currentScript ? document.currentScript.src.replace(/[^/]*$/, "") : "search/";
+    var loaded = {};
+    function load(name) {
+        if (!(name in loaded))
+            loaded[name] = fetch(base + name).then(function(r) { return r.json(); });
+        return loaded[name];
+    }
+    function shardName(term) {
+        return term.substr(0, %d).replace(/[^a-z0-9]/g, "_");
+    }
+    return function(query, callback) {
+        var terms = (query.toLowerCase().match(/[\\p{L}\\p{N}_]+/gu) || []).filter(function(t) { return t.length > 1; });
+        load("docs.json").then(function(index) {
+            var names = terms.map(shardName).filter(function(n) { return index.shards.indexOf(n) >= 0; });
+            return Promise.all(names.map(function(n) { return load(n + ".json"); })).then(function(list) {
+                var shards = {};
+                names.forEach(function(n, i) { shards[n] = list[i]; });
+                var scores = {};
+                var matched = {};
+                terms.forEach(function(term) {
+                    var shard = shards[shardName(term)] || {};
+                    (shard[term] || []).forEach(function(posting) {
+                        scores[posting[0]] = (scores[posting[0]] || 0) + posting[1];
+                        matched[posting[0]] = (matched[posting[0]] || 0) + 1;
+                    });
+                });
+                var results = [];
+                for (var id in scores) {
+                    if (matched[id] == terms.length && index.docs[id])
+                        results.push({url: index.docs[id][0], title: index.docs[id][1], score: scores[id]});
+                }
+                results.sort(function(a, b) { return b.score - a.score; });
+                callback(results);
+            });
+        });
+    };
+})();
+""" % PREFIX_LENGTH
+
+
+# Static full-text search index of the pages and posts. The words of every
+# page are counted and written as an inverted index, split into shards by the
+# first characters of the words, so a browser only loads the shards for the
+# words it is searching. The words of every page are kept in the cache, only
+# pages rendered in a build are tokenized again and only shards containing
+# their words are rewritten.
+class SearchIndex:
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.pages = {}
+        self.ids = {}
+        self.touched = set()
+
+    def load(self):
+        self.pages = {}
+        self.ids = {}
+        self.touched = set()
+        if not os.path.exists(self.filename):
+            return False
+        try:
+            with open(self.filename, "r") as f:
+                data = json.load(f)
+        except:
+            type, value, traceback = sys.exc_info()
+            print("Unable to read search index " + self.filename, type, value, traceback)
+            return False
+        self.pages = data.get("pages", {})
+        self.ids = data.get("ids", {})
+        return True
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.filename), exist_ok=True)
+        tmp = self.filename + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"pages": self.pages, "ids": self.ids}, f)
+        os.replace(tmp, self.filename)
+
+    def has(self, url):
+        return url in self.pages
+
+    @staticmethod
+    def tokenize(text):
+        text = re.sub(r"(?is)<(script|style)\b.*?</\1\s*>", " ", text)
+        text = re.sub(r"(?s)<!--.*?-->", " ", text)
+        text = re.sub(r"(?s)\{\{.*?\}\}|\{%.*?%\}", " ", text)
+        text = html.unescape(re.sub(r"<[^>]*>", " ", text))
+        terms = {}
+        for term in re.findall(r"\w+", text.lower()):
+            if 1 < len(term) <= MAX_TERM_LENGTH:
+                terms[term] = terms.get(term, 0) + 1
+        return terms
+
+    @staticmethod
+    def shardName(term):
+        return "".join(c if c.isascii() and c.isalnum() else "_" for c in term[:PREFIX_LENGTH])
+
+    def touch(self, terms):
+        for term in terms:
+            self.touched.add(SearchIndex.shardName(term))
+
+    def addPage(self, url, title, text):
+        terms = SearchIndex.tokenize(title + " " + text)
+        old = self.pages.get(url)
+        if old and old["title"] == title and old["terms"] == terms:
+            return
+        if old:
+            self.touch(old["terms"])
+        self.touch(terms)
+        if url not in self.ids:
+            # ids of removed pages are reused, so the ids of the other pages and their shards stay the same
+            used = set(self.ids.values())
+            id = 0
+            while id in used:
+                id += 1
+            self.ids[url] = id
+        self.pages[url] = {"title": title, "terms": terms}
+
+    def removePage(self, url):
+        if url in self.pages:
+            self.touch(self.pages[url]["terms"])
+            del self.pages[url]
+        self.ids.pop(url, None)
+
+    def removeOtherPages(self, urls):
+        for url in list(self.pages):
+            if url not in urls:
+                self.removePage(url)
+
+    def write(self, dir):
+        os.makedirs(dir, exist_ok=True)
+        shards = set()
+        for page in self.pages.values():
+            for term in page["terms"]:
+                shards.add(SearchIndex.shardName(term))
+        # shards which are missing in the output, for example after the site directory has been cleared
+        for name in shards:
+            if not os.path.exists(os.path.join(dir, name + ".json")):
+                self.touched.add(name)
+
+        postings = {name: {} for name in self.touched if name in shards}
+        if postings:
+            for url, page in self.pages.items():
+                for term, count in page["terms"].items():
+                    shard = postings.get(SearchIndex.shardName(term))
+                    if shard is not None:
+                        shard.setdefault(term, []).append([self.ids[url], count])
+        for name, shard in postings.items():
+            for term in shard:
+                shard[term].sort(key=lambda posting: (-posting[1], posting[0]))
+            self.writeFile(os.path.join(dir, name + ".json"), json.dumps(shard, sort_keys=True, separators=(",", ":"), ensure_ascii=False))
+        for name in self.touched - shards:
+            if os.path.exists(os.path.join(dir, name + ".json")):
+                os.remove(os.path.join(dir, name + ".json"))
+
+        docs = [None] * (max(self.ids.values()) + 1 if self.ids else 0)
+        for url, id in self.ids.items():
+            docs[id] = [url, self.pages[url]["title"]]
+        index = {"prefix": PREFIX_LENGTH, "shards": sorted(shards), "docs": docs}
+        self.writeFile(os.path.join(dir, "docs.json"), json.dumps(index, sort_keys=True, separators=(",", ":"), ensure_ascii=False))
+        self.writeFile(os.path.join(dir, "search.js"), SEARCH_SCRIPT)
+        self.touched = set()
+
+    def writeFile(self, filename, text):
+        data = text.encode("utf-8")
+        try:
+            with open(filename, "rb") as f:
+                if f.read() == data:
+                    return
+        except OSError:
+            pass
+        tmp = filename + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, filename)
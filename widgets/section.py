@@ -108,28 +108,27 @@ class Section(Item):
                 if not item.tag_name in list:
                     list.append(item.tag_name)
 
-    def getHtml(self):
-        html = ""
+    def writeHtml(self, f):
         if self.fullwidth:
             for item in self._items:
-                html += item.getHtml() + "\n"
+                item.writeHtml(f)
+                f.write("\n")
         else:
-            html += "<section"
+            f.write("<section")
             if self._cssclass:
                 cssclass = self._cssclass
             else:
                 cssclass = "container"
-            html += " class=\"" + cssclass + "\""
+            f.write(" class=\"" + cssclass + "\"")
             if self._id:
-                html += " id=\"" + self._id +"\""
+                f.write(" id=\"" + self._id +"\"")
             if self._style:
-                html += " style=\"" + self._style + "\""
+                f.write(" style=\"" + self._style + "\"")
             if self._attributes:
-                html += " " + self._attributes
-            html += ">\n"
+                f.write(" " + self._attributes)
+            f.write(">\n")
             for item in self._items:
-                html += item.getHtml()
-        return html
+                item.writeHtml(f)
 
     def insertElement(self, sec, new_pos):
         self._items.insert(new_pos, sec)
\ No newline at end of file
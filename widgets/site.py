@@ -26,8 +26,8 @@ from widgets.menu import Menu
 from widgets.menuitem import Menuitem
 from widgets.menus import Menus
 from widgets.generator import Generator
-from PyQt5.QtCore import QFileInfo, QObject, pyqtProperty, QUrl
-from PyQt5.QtQml import QQmlEngine, QQmlComponent
+from widgets.qmlparser import loadQml
+from PyQt5.QtCore import QFileInfo, QObject, pyqtProperty
 
 
 class Site(QObject):
@@ -46,6 +46,7 @@ class Site(QObject):
         self._theme = ""
         self._title = ""
         self._logo = ""
+        self._url = ""
         self.attributes = {}
         self.pages = []
         self.posts = []
@@ -116,6 +117,14 @@ class Site(QObject):
     def logo(self, logo):
         self._logo = logo
 
+    @pyqtProperty('QString')
+    def url(self):
+        return self._url
+
+    @url.setter
+    def url(self, url):
+        self._url = url
+
     def setFilename(self, filename):
         info = QFileInfo(filename)
         self.filename = info.fileName()
@@ -139,6 +148,8 @@ class Site(QObject):
             f.write("   author: '" + self.author + "'\n")
             f.write("   logo: '" + self.logo + "'\n")
             f.write("   publisher: '" + self.publisher + "'\n")
+            if self.url:
+                f.write("   url: '" + self.url + "'\n")
             f.write("}\n")
         if self.win:
             self.win.statusBar().showMessage("Site has been saved")
@@ -173,16 +184,10 @@ class Site(QObject):
         self.menus._menus.append(menu)
 
     def loadMenus(self):
-        engine = QQmlEngine()
-        component = QQmlComponent(engine)
-        component.loadUrl(QUrl(os.path.join(self.source_path, "Menus.qml")))
-        self.menus = component.create()
+        self.menus = loadQml(os.path.join(self.source_path, "Menus.qml"))
         if self.menus is not None:
-            self.win.statusBar().showMessage("Menus have been loaded")
-        else:
-            for error in component.errors():
-                print(error.toString())
-        del engine
+            if self.win:
+                self.win.statusBar().showMessage("Menus have been loaded")
 
     def removeMenu(self, menu):
         self.menus.remove(menu)
@@ -199,23 +204,18 @@ class Site(QObject):
             for file in files:
                 page = self.loadContent(file, ContentType.PAGE)
                 self.pages.append(page)
-        self.win.statusBar().showMessage("Pages have been loaded")
+        if self.win:
+            self.win.statusBar().showMessage("Pages have been loaded")
 
     def loadContent(self, source, type):
         if type == ContentType.PAGE:
             sub = "pages"
         else:
             sub = "posts"
-        engine = QQmlEngine()
-        component = QQmlComponent(engine)
-        component.loadUrl(QUrl(os.path.join(self.source_path, sub, source)))
-        content = component.create()
+        content = loadQml(os.path.join(self.source_path, sub, source))
         if content is not None:
             content.source = source
             content.content_type = type
-        else:
-            for error in component.errors():
-                print(error.toString())
         return content
 
     def loadPosts(self):
@@ -224,7 +224,8 @@ class Site(QObject):
             for file in files:
                 post = self.loadContent(file, ContentType.POST)
                 self.posts.append(post)
-        self.win.statusBar().showMessage("Posts have been loaded")
+        if self.win:
+            self.win.statusBar().showMessage("Posts have been loaded")
 
     def createTemporaryContent(self, type):
         temp = NamedTemporaryFile()
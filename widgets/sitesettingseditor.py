@@ -42,6 +42,8 @@ class SiteSettingsEditor(UndoableEditor):
         self.keywords = QLineEdit()
         self.author = QLineEdit()
         self.logo = QLineEdit()
+        self.url = QLineEdit()
+        self.url.setPlaceholderText("https://www.example.com")
         seekButton = QPushButton("...")
         self.image = ImageSelector()
         self.image.setImage(QImage(":/images/image_placeholder.png"))
@@ -73,7 +75,9 @@ class SiteSettingsEditor(UndoableEditor):
         self.layout.setRowStretch(13, 1)
         self.layout.addWidget(QLabel("Plugin to be used for publishing"), 14, 0)
         self.layout.addWidget(self.publisher, 15, 0)
-        self.layout.addLayout(vbox, 16, 0)
+        self.layout.addWidget(QLabel("Url of the published site, used for the sitemap and the feeds"), 16, 0)
+        self.layout.addWidget(self.url, 17, 0, 1, 3)
+        self.layout.addLayout(vbox, 18, 0)
 
         self.load()
 
@@ -83,6 +87,7 @@ class SiteSettingsEditor(UndoableEditor):
         self.keywords.editingFinished.connect(self.keywordsChanged)
         self.author.editingFinished.connect(self.authorChanged)
         self.logo.editingFinished.connect(self.logoChanged)
+        self.url.editingFinished.connect(self.urlChanged)
         self.publisher.currentIndexChanged.connect(self.publisherChanged)
         seekButton.clicked.connect(self.seek)
 
@@ -121,6 +126,7 @@ class SiteSettingsEditor(UndoableEditor):
         self.keywords.setText(self.site.keywords)
         self.author.setText(self.site.author)
         self.logo.setText(self.site.logo)
+        self.url.setText(self.site.url)
         if self.site.logo:
             self.image.setImage(QImage(os.path.join(self.site.source_path, "assets", "images", self.site.logo)))
         index = self.publisher.findData(self.site.publisher)
@@ -144,6 +150,7 @@ class SiteSettingsEditor(UndoableEditor):
             self.site.keywords = self.keywords.text()
             self.site.publisher = self.publisher.currentData()
             self.site.logo = self.logo.text()
+            self.site.url = self.url.text()
             self.site.save()
             self.win.statusBar().showMessage("Site settings have been saved. Site should be rebuilded on the dashboard.")
 
@@ -163,6 +170,10 @@ class SiteSettingsEditor(UndoableEditor):
         if self.site.logo != self.logo.text():
             self.contentChanged("logo changed")
 
+    def urlChanged(self):
+        if self.site.url != self.url.text():
+            self.contentChanged("url changed")
+
     def descriptionChanged(self):
         if self.site.description != self.description.text():
             self.contentChanged("description changed")
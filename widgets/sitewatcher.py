@@ -0,0 +1,189 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import os
+from widgets.content import ContentType
+from widgets.generator import Generator
+from widgets.qmlparser import loadQml
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+SITE_PROPERTIES = ["title", "theme", "description", "copyright", "keywords", "author", "logo", "publisher", "url"]
+
+
+# Watches the sources of a site and the theme and rebuilds what has changed.
+# Events are collected until nothing happened for a moment, because editors
+# and version control write many files at once. A changed page or post is
+# reloaded and only that output is built, every other change runs an
+# incremental build which only renders the outputs depending on it.
+class SiteWatcher(QObject):
+    changed = pyqtSignal()
+    built = pyqtSignal(str)
+    delay = 300
+
+    def __init__(self, site, win = None, createGenerator = None, build = True):
+        super().__init__()
+        self.site = site
+        self.win = win
+        self.createGenerator = createGenerator
+        self.build = build
+        self.changed_paths = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.pathChanged)
+        self.watcher.directoryChanged.connect(self.pathChanged)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(SiteWatcher.delay)
+        self.timer.timeout.connect(self.rebuild)
+        self.watchPaths()
+
+    def stop(self):
+        self.timer.stop()
+        paths = self.watcher.files() + self.watcher.directories()
+        if paths:
+            self.watcher.removePaths(paths)
+
+    def sourceDirs(self):
+        theme_dir = os.path.join(Generator.themesPath(), self.site.theme)
+        return [
+            os.path.join(self.site.source_path, "pages"),
+            os.path.join(self.site.source_path, "posts"),
+            os.path.join(self.site.source_path, "layouts"),
+            os.path.join(self.site.source_path, "includes"),
+            os.path.join(self.site.source_path, "assets"),
+            os.path.join(self.site.source_path, "content"),
+            os.path.join(theme_dir, "layouts"),
+            os.path.join(theme_dir, "includes"),
+            os.path.join(theme_dir, "assets")
+        ]
+
+    def watchPaths(self):
+        # files which have been replaced by an editor are no longer watched, so this runs after every rebuild
+        paths = [self.site.source_path, os.path.join(self.site.source_path, "Site.qml"), os.path.join(self.site.source_path, "Menus.qml")]
+        for dir in self.sourceDirs():
+            for root, dirs, files in os.walk(dir):
+                paths.append(root)
+                for file in files:
+                    paths.append(os.path.join(root, file))
+        watched = set(self.watcher.files() + self.watcher.directories())
+        paths = [path for path in paths if path not in watched and os.path.exists(path)]
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def pathChanged(self, path):
+        self.changed_paths.add(path)
+        self.timer.start()
+
+    def rebuild(self):
+        paths = self.changed_paths
+        self.changed_paths = set()
+        self.watchPaths()
+
+        full = False
+        contents = []
+        for path in sorted(paths):
+            if os.path.isdir(path):
+                if self.contentListChanged(path):
+                    full = True
+                continue
+            dir, file = os.path.split(path)
+            if dir == self.site.source_path:
+                if file == "Site.qml":
+                    self.reloadSite()
+                    full = True
+                elif file == "Menus.qml":
+                    self.site.loadMenus()
+                    full = True
+                continue
+            content = self.reloadContent(path)
+            if content:
+                contents.append(content)
+            elif content is None:
+                full = True
+        self.changed.emit()
+        if not self.build:
+            return
+
+        if full:
+            self.generate()
+            self.built.emit(self.site.title + " has been rebuilt")
+        else:
+            for content in contents:
+                self.generate(content)
+                self.built.emit(content.url() + " has been rebuilt")
+
+    def contentListChanged(self, path):
+        # files have been added to or removed from pages or posts
+        if path == os.path.join(self.site.source_path, "pages"):
+            type = ContentType.PAGE
+            contents = self.site.pages
+        elif path == os.path.join(self.site.source_path, "posts"):
+            type = ContentType.POST
+            contents = self.site.posts
+        else:
+            return path != self.site.source_path
+        sources = set(file for file in os.listdir(path) if os.path.isfile(os.path.join(path, file)))
+        if sources == set(content.source for content in contents):
+            return False
+        if type == ContentType.PAGE:
+            self.site.loadPages()
+        else:
+            self.site.loadPosts()
+        return True
+
+    def reloadContent(self, path):
+        # returns the reloaded page or post, None if another source has changed
+        # and False if the page or post can not be loaded
+        dir, source = os.path.split(path)
+        if dir == os.path.join(self.site.source_path, "pages"):
+            type = ContentType.PAGE
+            contents = self.site.pages
+        elif dir == os.path.join(self.site.source_path, "posts"):
+            type = ContentType.POST
+            contents = self.site.posts
+        else:
+            return None
+        for i, content in enumerate(contents):
+            if content.source == source:
+                if not os.path.exists(path):
+                    self.contentListChanged(dir)
+                    return None
+                content = self.site.loadContent(source, type)
+                if content is None:
+                    print("Unable to load " + path)
+                    return False
+                contents[i] = content
+                return content
+        return None
+
+    def reloadSite(self):
+        site = loadQml(os.path.join(self.site.source_path, "Site.qml"))
+        if site is None:
+            return
+        for name in SITE_PROPERTIES:
+            setattr(self.site, name, getattr(site, name))
+        self.site.attributes = site.attributes
+
+    def generate(self, content = None):
+        if self.createGenerator:
+            gen = self.createGenerator()
+        else:
+            gen = Generator()
+            gen.incremental = True
+        gen.generateSite(self.win, self.site, content)
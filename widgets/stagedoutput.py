@@ -0,0 +1,92 @@
+#############################################################################
+# Copyright (C) 2019 Olaf Japp
+#
+# This file is part of FlatSiteBuilder.
+#
+#  FlatSiteBuilder is free software: you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation, either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  FlatSiteBuilder is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with FlatSiteBuilder.  If not, see <http://www.gnu.org/licenses/>.
+#
+#############################################################################
+
+import ctypes
+import ctypes.util
+import os
+import shutil
+
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+
+# A full build is rendered into a staging directory next to the site directory.
+# The staging directory is seeded with hardlinks of the current output, so
+# unchanged files are reused. Pages and assets are always written to a new file
+# which replaces the old one, so the live output is never changed through a link.
+# When the build succeeds both directories are exchanged with one rename.
+class StagedOutput:
+
+    def __init__(self, site_dir):
+        self.site_dir = site_dir
+        self.staging_dir = os.path.join(os.path.dirname(site_dir), "." + os.path.basename(site_dir) + ".staging")
+
+    def prepare(self, reuse = True):
+        if os.path.exists(self.staging_dir):
+            # left over by a build which has been interrupted
+            shutil.rmtree(self.staging_dir)
+        os.makedirs(self.staging_dir)
+        if not reuse or not os.path.isdir(self.site_dir):
+            return self.staging_dir
+        for root, dirs, files in os.walk(self.site_dir):
+            if root == self.site_dir and ".git" in dirs:
+                dirs.remove(".git")
+            dst = os.path.join(self.staging_dir, os.path.relpath(root, self.site_dir))
+            for d in dirs:
+                os.makedirs(os.path.join(dst, d), exist_ok=True)
+            for f in files:
+                try:
+                    os.link(os.path.join(root, f), os.path.join(dst, f))
+                except OSError:
+                    shutil.copy2(os.path.join(root, f), os.path.join(dst, f))
+        return self.staging_dir
+
+    def abort(self):
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+    def commit(self):
+        if not os.path.isdir(self.site_dir):
+            os.rename(self.staging_dir, self.site_dir)
+            return
+
+        # the git repository of the deployed site belongs to the output
+        git_dir = os.path.join(self.site_dir, ".git")
+        if os.path.isdir(git_dir):
+            os.rename(git_dir, os.path.join(self.staging_dir, ".git"))
+
+        if not exchange(self.staging_dir, self.site_dir):
+            # no atomic exchange available, the site directory is missing between both renames
+            old_dir = self.staging_dir + ".old"
+            shutil.rmtree(old_dir, ignore_errors=True)
+            os.rename(self.site_dir, old_dir)
+            os.rename(self.staging_dir, self.site_dir)
+            os.rename(old_dir, self.staging_dir)
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+def exchange(path1, path2):
+    # renameat2 with RENAME_EXCHANGE swaps two directories atomically on Linux
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError, TypeError):
+        return False
+    renameat2.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_uint]
+    return renameat2(AT_FDCWD, os.fsencode(path1), AT_FDCWD, os.fsencode(path2), RENAME_EXCHANGE) == 0